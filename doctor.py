@@ -1,18 +1,34 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import functools
 import importlib
+import os
 import platform
 import sys
-from pathlib import Path
+
+SCHEMA_PATH = os.path.join("migrations", "schema.sql")
 
 def check_module(name: str) -> tuple[bool, str]:
+    # mdr_gtk.app / mdr_gtk.ui import their parents; skip the import machinery for those
+    if sys.modules.get(name) is not None:
+        return True, f"OK: python module {name}"
     try:
         importlib.import_module(name)
         return True, f"OK: python module {name}"
     except Exception as e:
         return False, f"FAIL: python module {name} -> {e}"
 
+@functools.lru_cache(maxsize=None)
+def check_gtk4() -> tuple[bool, str]:
+    try:
+        import gi
+        gi.require_version("Gtk", "4.0")
+        from gi.repository import Gtk  # noqa
+        return True, "OK: Gtk 4 import"
+    except Exception as e:
+        return False, f"FAIL: Gtk 4 import -> {e}"
+
 def main() -> int:
     print("MDR GTK Doctor (cross-platform)")
     print("------------------------------")
@@ -30,17 +46,11 @@ def main() -> int:
     ok, msg = check_module("gi")
     print(msg)
     if ok:
-        try:
-            import gi
-            gi.require_version("Gtk", "4.0")
-            from gi.repository import Gtk  # noqa
-            print("OK: Gtk 4 import")
-        except Exception as e:
-            print("FAIL: Gtk 4 import ->", e)
-            ok_all = False
-
-    schema = Path("migrations/schema.sql")
-    if schema.exists():
+        ok, msg = check_gtk4()
+        print(msg)
+        ok_all = ok_all and ok
+
+    if os.path.exists(SCHEMA_PATH):
         print("OK: migrations/schema.sql")
     else:
         print("FAIL: migrations/schema.sql missing")
@@ -12,11 +12,24 @@ except Exception:
     HAVE_ADW = False
     Adw = None  # type: ignore
 
-from mdr_gtk.ui import MDRWindow
-from mdr_gtk.diagnostics import run_diagnostics, REQUIRED_ACTIONS
+from mdr_gtk.diagnostics import run_diagnostics, REQUIRED_ACTIONS, REQUIRED_ACTION_SET
 
 
 class MDRApp(Gtk.Application):
+    # app action name -> MDRWindow method it forwards to
+    _ACTIONS: dict[str, str] = {
+        "export_json": "export_json_dialog",
+        "import_json": "import_json_dialog",
+        "export_csv": "export_csv_dialog",
+        "export_skos": "export_skos_dialog",
+        "open_db": "open_db_dialog",
+        "new_db": "new_db_dialog",
+        "import_fhir_bundle": "import_fhir_bundle_dialog",
+        "import_fhir_package": "import_fhir_package_dialog",
+        "export_fhir_bundle_json": "export_fhir_bundle_json_dialog",
+        "export_fhir_bundle_xml": "export_fhir_bundle_xml_dialog",
+    }
+
     def __init__(self, db_path: str):
         super().__init__(application_id="org.example.mdrgtk")
         self.db_path = db_path
@@ -24,11 +37,7 @@ class MDRApp(Gtk.Application):
     def do_startup(self):
         Gtk.Application.do_startup(self)
         # App actions for menu
-        for name in ["export_json","import_json","export_csv","export_skos",
-            "open_db", "new_db",
-            "import_fhir_bundle","import_fhir_package",
-            "export_fhir_bundle_json","export_fhir_bundle_xml"
-        ]:
+        for name in self._ACTIONS:
             act = Gio.SimpleAction.new(name, None)
             act.connect("activate", self._on_action)
             self.add_action(act)
@@ -39,37 +48,20 @@ class MDRApp(Gtk.Application):
         try:
             if not win:
                 return
-            name = action.get_name()
-            if name == "export_json":
-                win.export_json_dialog()
-            elif name == "import_json":
-                win.import_json_dialog()
-            elif name == "export_csv":
-                win.export_csv_dialog()
-            elif name == "open_db":
-                win.open_db_dialog()
-            elif name == "new_db":
-                win.new_db_dialog()
-
-            elif name == "import_fhir_bundle":
-                win.import_fhir_bundle_dialog()
-            elif name == "import_fhir_package":
-                win.import_fhir_package_dialog()
-            elif name == "export_fhir_bundle_json":
-                win.export_fhir_bundle_json_dialog()
-            elif name == "export_fhir_bundle_xml":
-                win.export_fhir_bundle_xml_dialog()
-
-            elif name == "export_skos":
-                win.export_skos_dialog()
-
+            method = getattr(win, self._ACTIONS.get(action.get_name(), ""), None)
+            if method:
+                method()
         except Exception as e:
             try:
                 win._log(f"Action {action.get_name()} failed: {e}")
                 win._show_error_dialog("Action failed", str(e))
             except Exception:
                 print(f"Action {action.get_name()} failed: {e}")
+
     def do_activate(self):
+        # ui pulls in the whole repository/FHIR stack; import it only when a window is needed
+        from mdr_gtk.ui import MDRWindow
+
         win = MDRWindow(self, self.db_path, use_adwaita=HAVE_ADW)
         win.present()
         # Startup self-check (prints to console and log panel)
@@ -80,7 +72,8 @@ class MDRApp(Gtk.Application):
             except Exception:
                 print("[self-check] " + line)
 
-        missing = [a for a in REQUIRED_ACTIONS if self.lookup_action(a) is None]
+        # one list_actions() call instead of a lookup_action() GObject call per name
+        missing = sorted(REQUIRED_ACTION_SET.difference(self.list_actions()), key=REQUIRED_ACTIONS.index)
         if missing:
             msg = "FAIL: missing actions: " + ", ".join(missing)
             try:
@@ -1,12 +1,204 @@
 from __future__ import annotations
 
+import os
 import sqlite3
+import sys
 
 
-def connect(db_path: str) -> sqlite3.Connection:
-    conn = sqlite3.connect(db_path)
+def _mmap_size() -> int:
+    """Bytes of the DB file SQLite may memory-map.
+
+    Defaults to 256 MiB on 64-bit interpreters and 0 (disabled) on 32-bit ones,
+    where address space is scarce. Override with MDR_SQLITE_MMAP_SIZE.
+    """
+    env = os.environ.get("MDR_SQLITE_MMAP_SIZE")
+    if env is not None:
+        try:
+            return max(0, int(env))
+        except ValueError:
+            pass
+    return 268435456 if sys.maxsize > 2**32 else 0
+
+
+def fast_ingest_default() -> bool:
+    """True when MDR_FAST_INGEST is set (to anything but "" / "0")."""
+    return os.environ.get("MDR_FAST_INGEST", "") not in ("", "0")
+
+
+# Indexes added after the initial schema release, by name. schema.sql creates them
+# for new databases; ensure_indexes() backfills them on existing ones. Tables that do
+# not exist yet (uninitialized DB) are skipped and picked up once the schema is applied.
+_LATE_INDEXES = (
+    ("ix_ri_type_name_nocase",
+     "CREATE INDEX IF NOT EXISTS ix_ri_type_name_nocase ON registrable_item(item_type, preferred_name COLLATE NOCASE)"),
+    ("ix_curated_last_seen",
+     "CREATE INDEX IF NOT EXISTS ix_curated_last_seen ON fhir_curated_resource(last_seen_ts DESC)"),
+    ("ix_curated_rt_lastseen",
+     "CREATE INDEX IF NOT EXISTS ix_curated_rt_lastseen ON fhir_curated_resource(resource_type, last_seen_ts DESC)"),
+    ("ix_raw_sha_firstseen",
+     "CREATE INDEX IF NOT EXISTS ix_raw_sha_firstseen ON fhir_raw_resource(resource_sha256, first_seen_ts DESC)"),
+)
+
+
+# Trigram full-text index over the curated list's text filter columns. Kept out of
+# schema.sql because FTS5 (and the trigram tokenizer, SQLite >= 3.34) is a build
+# option: without it the curated filter falls back to a LIKE scan.
+_CURATED_FTS_DDL = """
+CREATE VIRTUAL TABLE fhir_curated_fts USING fts5(
+  canonical_url, logical_id,
+  content='fhir_curated_resource', content_rowid='curated_id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS fhir_curated_fts_ai AFTER INSERT ON fhir_curated_resource BEGIN
+  INSERT INTO fhir_curated_fts(rowid, canonical_url, logical_id)
+  VALUES (new.curated_id, new.canonical_url, new.logical_id);
+END;
+CREATE TRIGGER IF NOT EXISTS fhir_curated_fts_ad AFTER DELETE ON fhir_curated_resource BEGIN
+  INSERT INTO fhir_curated_fts(fhir_curated_fts, rowid, canonical_url, logical_id)
+  VALUES ('delete', old.curated_id, old.canonical_url, old.logical_id);
+END;
+CREATE TRIGGER IF NOT EXISTS fhir_curated_fts_au AFTER UPDATE OF canonical_url, logical_id ON fhir_curated_resource BEGIN
+  INSERT INTO fhir_curated_fts(fhir_curated_fts, rowid, canonical_url, logical_id)
+  VALUES ('delete', old.curated_id, old.canonical_url, old.logical_id);
+  INSERT INTO fhir_curated_fts(rowid, canonical_url, logical_id)
+  VALUES (new.curated_id, new.canonical_url, new.logical_id);
+END;
+INSERT INTO fhir_curated_fts(fhir_curated_fts) VALUES ('rebuild');
+"""
+
+
+# Same idea for the registrable item list search (Repo.list_items). registrable_item
+# has no INTEGER PRIMARY KEY, so its implicit rowids may change on VACUUM and cannot
+# serve as content_rowid. registrable_item_fts_key assigns each uuid a stable rowid
+# instead: the triggers find the FTS row through its uuid index and delete by rowid,
+# so a write costs one index lookup, not a scan of the FTS table.
+_ITEM_FTS_DDL = """
+CREATE TABLE registrable_item_fts_key (
+  fts_rowid INTEGER PRIMARY KEY,
+  uuid TEXT NOT NULL UNIQUE
+);
+CREATE VIRTUAL TABLE registrable_item_fts USING fts5(
+  preferred_name, definition, tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS registrable_item_fts_ai AFTER INSERT ON registrable_item BEGIN
+  INSERT INTO registrable_item_fts_key(uuid) VALUES (new.uuid);
+  INSERT INTO registrable_item_fts(rowid, preferred_name, definition)
+  VALUES (last_insert_rowid(), new.preferred_name, new.definition);
+END;
+CREATE TRIGGER IF NOT EXISTS registrable_item_fts_ad AFTER DELETE ON registrable_item BEGIN
+  DELETE FROM registrable_item_fts
+    WHERE rowid = (SELECT fts_rowid FROM registrable_item_fts_key WHERE uuid = old.uuid);
+  DELETE FROM registrable_item_fts_key WHERE uuid = old.uuid;
+END;
+CREATE TRIGGER IF NOT EXISTS registrable_item_fts_au AFTER UPDATE OF uuid, preferred_name, definition ON registrable_item BEGIN
+  DELETE FROM registrable_item_fts
+    WHERE rowid = (SELECT fts_rowid FROM registrable_item_fts_key WHERE uuid = old.uuid);
+  UPDATE registrable_item_fts_key SET uuid = new.uuid WHERE uuid = old.uuid;
+  INSERT INTO registrable_item_fts(rowid, preferred_name, definition)
+  VALUES ((SELECT fts_rowid FROM registrable_item_fts_key WHERE uuid = new.uuid),
+          new.preferred_name, new.definition);
+END;
+INSERT INTO registrable_item_fts_key(uuid) SELECT uuid FROM registrable_item;
+INSERT INTO registrable_item_fts(rowid, preferred_name, definition)
+  SELECT k.fts_rowid, ri.preferred_name, ri.definition
+  FROM registrable_item_fts_key k JOIN registrable_item ri ON ri.uuid = k.uuid;
+"""
+
+def _has_table(conn, name: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def has_curated_fts(conn) -> bool:
+    return _has_table(conn, "fhir_curated_fts")
+
+
+def has_item_fts(conn) -> bool:
+    return _has_table(conn, "registrable_item_fts_key")
+
+
+def _ensure_fts(conn: sqlite3.Connection, marker_table: str, base_table: str, ddl: str) -> bool:
+    if _has_table(conn, marker_table):
+        return True
+    if not _has_table(conn, base_table):
+        return False
+    try:
+        conn.executescript("BEGIN;" + ddl + "COMMIT;")
+    except sqlite3.OperationalError:
+        # no fts5 / trigram tokenizer in this SQLite build
+        if conn.in_transaction:
+            conn.rollback()
+        return False
+    return True
+
+
+def ensure_curated_fts(conn: sqlite3.Connection) -> bool:
+    """Create + backfill the curated text index if possible; return whether it exists."""
+    return _ensure_fts(conn, "fhir_curated_fts", "fhir_curated_resource", _CURATED_FTS_DDL)
+
+
+def ensure_item_fts(conn: sqlite3.Connection) -> bool:
+    """Create + backfill the registrable item text index if possible; return whether it exists."""
+    return _ensure_fts(conn, "registrable_item_fts_key", "registrable_item", _ITEM_FTS_DDL)
+
+
+# Everything ensure_indexes() may have to create; the FTS entries are the tables
+# has_curated_fts() / has_item_fts() look for.
+_LATE_OBJECTS = tuple(name for name, _ in _LATE_INDEXES) + ("fhir_curated_fts", "registrable_item_fts_key")
+_SQL_LATE_OBJECTS_PRESENT = (
+    "SELECT name FROM sqlite_master WHERE name IN (" + ", ".join("?" * len(_LATE_OBJECTS)) + ")"
+)
+
+
+def ensure_indexes(conn: sqlite3.Connection) -> None:
+    """Upgrade step: backfill the late indexes and the FTS indexes.
+
+    Run by :func:`mdr_gtk.services.ensure_schema_applied`, not per connection. On a
+    database that already has all of them this is a single sqlite_master query.
+    """
+    present = {name for (name,) in conn.execute(_SQL_LATE_OBJECTS_PRESENT, _LATE_OBJECTS)}
+    created = False
+    for name, stmt in _LATE_INDEXES:
+        if name in present:
+            continue
+        try:
+            conn.execute(stmt)
+            created = True
+        except sqlite3.OperationalError:
+            # no such table: schema not applied yet
+            continue
+    if created:
+        conn.commit()
+    if "fhir_curated_fts" not in present:
+        ensure_curated_fts(conn)
+    if "registrable_item_fts_key" not in present:
+        ensure_item_fts(conn)
+
+
+def connect(db_path: str, *, fast: bool = False) -> sqlite3.Connection:
+    """Open the MDR database with the standard PRAGMAs.
+
+    ``fast`` is meant for bulk-ingest connections only: it sets
+    ``synchronous = OFF`` so commits do not wait for fsync. WAL stays on, so an
+    application crash is still safe, but an OS crash or power loss may drop the
+    most recent imports or damage the database file. Readers and exporters
+    should keep the default.
+    """
+    # Larger prepared-statement cache: ingest/export cycle through many distinct SQL texts.
+    conn = sqlite3.connect(db_path, cached_statements=256)
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
-    conn.execute("PRAGMA journal_mode = WAL;")
-    conn.execute("PRAGMA synchronous = NORMAL;")
+    # One executescript round-trip instead of a prepare/step/finalize per PRAGMA.
+    conn.executescript(
+        "PRAGMA foreign_keys = ON;"
+        "PRAGMA journal_mode = WAL;"
+        "PRAGMA synchronous = NORMAL;"
+        f"PRAGMA mmap_size = {_mmap_size()};"
+        "PRAGMA cache_size = -65536;"  # 64 MiB page cache
+        "PRAGMA temp_store = MEMORY;"
+        "PRAGMA busy_timeout = 5000;"
+        "PRAGMA wal_autocheckpoint = 1000;"
+    )
+    if fast:
+        conn.execute("PRAGMA synchronous = OFF;")
     return conn
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable
 
+# __file__ never changes; resolve the package root once instead of per call
+_PKG_ROOT = Path(__file__).resolve().parents[1]
+
 REQUIRED_ACTIONS = [
     "export_json",
     "import_json",
@@ -16,6 +20,8 @@ REQUIRED_ACTIONS = [
     "export_fhir_bundle_json",
     "export_fhir_bundle_xml",
 ]
+# membership checks; the list above keeps the display order
+REQUIRED_ACTION_SET = frozenset(REQUIRED_ACTIONS)
 
 
 @dataclass
@@ -44,9 +50,9 @@ def run_diagnostics(project_root: str | None = None) -> DiagnosticResult:
         lines.append(f"FAIL: import mdr_gtk: {e}")
 
     # Check schema file
-    root = Path(project_root) if project_root else Path(__file__).resolve().parents[1]
+    root = Path(project_root) if project_root else _PKG_ROOT
     schema = root / "migrations" / "schema.sql"
-    if schema.exists():
+    if os.path.exists(schema):
         lines.append(f"OK: schema file present ({schema})")
     else:
         ok = False
@@ -1,16 +1,18 @@
 from __future__ import annotations
 
-import json
+import os
 from dataclasses import dataclass
-from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 import xml.etree.ElementTree as ET
 
 import sqlite3
 
+from mdr_gtk.util import json_dumps_bytes, json_loads
+
 
 FHIR_NS = "http://hl7.org/fhir"
 ET.register_namespace("", FHIR_NS)
+_NS_PREFIX = f"{{{FHIR_NS}}}"
 
 
 @dataclass
@@ -21,37 +23,74 @@ class ExportResult:
     out_path: Optional[str] = None
 
 
-def _get_latest_curated_shas(conn: sqlite3.Connection, limit: int) -> list[str]:
-    rows = conn.execute(
-        "SELECT current_sha256 FROM fhir_curated_resource ORDER BY last_seen_ts DESC LIMIT ?",
-        (limit,),
-    ).fetchall()
-    return [r[0] for r in rows if r and r[0]]
+def _iter_latest_curated_bytes(conn: sqlite3.Connection, limit: int) -> Iterator[bytes]:
+    """Yield the stored resource JSON (UTF-8 bytes) of the latest raw row per curated resource.
 
+    One joined query instead of one SELECT per curated SHA; the correlated
+    subquery picks the latest raw row (by first_seen_ts) for each SHA. Rows that
+    are not a JSON object with a resourceType (e.g. XML-ingested payloads) are
+    filtered inside SQLite. The column is cast to BLOB so rows arrive as bytes
+    without a str decode (and without touching the connection's text_factory).
+    """
+    cur = conn.cursor()
+    cur.arraysize = 128
+    cur.execute(
+        "SELECT CAST(r.resource_json AS BLOB) FROM fhir_curated_resource c "
+        "JOIN fhir_raw_resource r ON r.raw_id = ("
+        "  SELECT raw_id FROM fhir_raw_resource "
+        "  WHERE resource_sha256 = c.current_sha256 ORDER BY first_seen_ts DESC LIMIT 1"
+        ") "
+        "WHERE json_valid(r.resource_json) AND json_type(r.resource_json) = 'object' "
+        "AND IFNULL(json_extract(r.resource_json, '$.resourceType'), '') <> '' "
+        "ORDER BY c.last_seen_ts DESC LIMIT ?",
+        (limit,),
+    )
+    while True:
+        rows = cur.fetchmany()
+        if not rows:
+            break
+        for row in rows:
+            yield row[0]
+
+
+def _iter_latest_curated_json(conn: sqlite3.Connection, limit: int) -> Iterator[dict[str, Any]]:
+    """Like :func:`_iter_latest_curated_bytes`, but yields parsed resource dicts."""
+    for data in _iter_latest_curated_bytes(conn, limit):
+        try:
+            res = json_loads(data)
+        except Exception:
+            continue
+        if isinstance(res, dict) and res.get("resourceType"):
+            yield res
 
-def _get_resource_json_by_sha(conn: sqlite3.Connection, sha: str) -> Optional[dict[str, Any]]:
-    row = conn.execute(
-        "SELECT resource_json FROM fhir_raw_resource WHERE resource_sha256=? ORDER BY first_seen_ts DESC LIMIT 1",
-        (sha,),
-    ).fetchone()
-    if not row:
-        return None
-    try:
-        return json.loads(row[0])
-    except Exception:
-        return None
 
+def export_curated_bundle_json(conn: sqlite3.Connection, out_path: str, limit: int = 500, pretty: bool = False) -> ExportResult:
+    """Export curated resources as FHIR Bundle JSON.
 
-def export_curated_bundle_json(conn: sqlite3.Connection, out_path: str, limit: int = 500) -> ExportResult:
-    shas = _get_latest_curated_shas(conn, limit)
-    entries: list[dict[str, Any]] = []
-    for sha in shas:
-        res = _get_resource_json_by_sha(conn, sha)
-        if isinstance(res, dict) and res.get("resourceType"):
-            entries.append({"resource": res})
-    bundle = {"resourceType": "Bundle", "type": "collection", "entry": entries}
-    Path(out_path).write_text(json.dumps(bundle, indent=2, ensure_ascii=False), encoding="utf-8")
-    return ExportResult(True, f"Exported {len(entries)} resources to {out_path}", count=len(entries), out_path=out_path)
+    By default the bundle is streamed: stored resource JSON is spliced into the
+    output as-is (no parse/re-serialize round-trip), so memory stays at one row +
+    write buffer. ``pretty=True`` re-serializes the whole bundle with 2-space
+    indentation for human readers.
+    """
+    if pretty:
+        entries = [{"resource": res} for res in _iter_latest_curated_json(conn, limit)]
+        bundle = {"resourceType": "Bundle", "type": "collection", "entry": entries}
+        with open(out_path, "wb") as f:
+            f.write(json_dumps_bytes(bundle, indent=True))
+        return ExportResult(True, f"Exported {len(entries)} resources to {out_path}", count=len(entries), out_path=out_path)
+
+    count = 0
+    with open(out_path, "wb", buffering=1 << 20) as f:
+        f.write(b'{"resourceType":"Bundle","type":"collection","entry":[')
+        for data in _iter_latest_curated_bytes(conn, limit):
+            if count:
+                f.write(b",")
+            f.write(b'\n{"resource":')
+            f.write(data)
+            f.write(b"}")
+            count += 1
+        f.write(b"\n]}\n")
+    return ExportResult(True, f"Exported {count} resources to {out_path}", count=count, out_path=out_path)
 
 
 # -------------------------
@@ -65,27 +104,29 @@ def _xml_primitive(el: ET.Element, value: Any) -> None:
 
 def _json_to_fhir_xml(parent: ET.Element, key: str, value: Any) -> None:
     # Generic conversion: for dict => nested elements, list => repeated elements, primitives => value=""
-    if value is None:
-        return
-    if isinstance(value, list):
-        for item in value:
-            _json_to_fhir_xml(parent, key, item)
-        return
+    # Iterative walk (explicit stack, children pushed in reverse to keep document order).
+    stack: list[tuple[ET.Element, str, Any]] = [(parent, key, value)]
+    while stack:
+        parent, key, value = stack.pop()
+        if value is None:
+            continue
+        if isinstance(value, list):
+            stack.extend((parent, key, item) for item in reversed(value))
+            continue
 
-    el = ET.SubElement(parent, f"{{{FHIR_NS}}}{key}")
+        el = ET.SubElement(parent, _NS_PREFIX + key)
 
-    if isinstance(value, dict):
-        for k, v in value.items():
-            _json_to_fhir_xml(el, k, v)
-    else:
-        _xml_primitive(el, value)
+        if isinstance(value, dict):
+            stack.extend((el, k, v) for k, v in reversed(value.items()))
+        else:
+            _xml_primitive(el, value)
 
 
 def _resource_dict_to_xml(resource: dict[str, Any]) -> ET.Element:
     rt = resource.get("resourceType")
     if not isinstance(rt, str) or not rt:
         rt = "Resource"
-    root = ET.Element(f"{{{FHIR_NS}}}{rt}")
+    root = ET.Element(_NS_PREFIX + rt)
     for k, v in resource.items():
         if k == "resourceType":
             continue
@@ -93,29 +134,51 @@ def _resource_dict_to_xml(resource: dict[str, Any]) -> ET.Element:
     return root
 
 
+# fhir_xml is imported on first XML export (keeps JSON-only callers light) and
+# cached here so repeated exports skip the import machinery.
+_ENTRY_TO_XML = None
+
+
+def _get_entry_builder():
+    global _ENTRY_TO_XML
+    if _ENTRY_TO_XML is None:
+        from mdr_gtk.fhir_xml import bundle_entry_to_xml_element
+        _ENTRY_TO_XML = bundle_entry_to_xml_element
+    return _ENTRY_TO_XML
+
+
 def export_curated_bundle_xml(conn: sqlite3.Connection, out_path: str, limit: int = 500, mode: str = "best-effort") -> ExportResult:
     """Export curated resources as FHIR Bundle XML.
 
     mode:
       - best-effort: generic serializer for any resource
       - strict: validator-oriented subset (Bundle/Patient/Observation) + rejects unknown fields
-    """
-    from mdr_gtk.fhir_xml import resource_to_xml_element, XmlBuildResult
-
-    shas = _get_latest_curated_shas(conn, limit)
 
-    # Build Bundle JSON first (so XML serializer can handle Bundle.entry ordering)
-    entries = []
-    for sha in shas:
-        res = _get_resource_json_by_sha(conn, sha)
-        if isinstance(res, dict) and res.get("resourceType"):
-            entries.append({"resource": res})
-    bundle_json = {"resourceType": "Bundle", "type": "collection", "entry": entries}
+    The Bundle is streamed: each entry element is built, written and dropped, so
+    memory stays at one resource. Output goes to a ``.part`` file that replaces
+    ``out_path`` only on success (a strict-mode rejection leaves no file behind).
+    """
+    bundle_entry_to_xml_element = _get_entry_builder()
 
-    built = resource_to_xml_element(bundle_json, mode=mode)
-    if not built.ok or built.element is None:
-        return ExportResult(False, built.message, count=0, out_path=out_path)
+    if mode not in ("best-effort", "strict", "strictish"):
+        return ExportResult(False, f"Invalid mode: {mode}", count=0, out_path=out_path)
 
-    tree = ET.ElementTree(built.element)
-    tree.write(out_path, encoding="utf-8", xml_declaration=True)
-    return ExportResult(True, f"Exported {len(entries)} resources to {out_path} (mode={mode})", count=len(entries), out_path=out_path)
+    tmp_path = out_path + ".part"
+    count = 0
+    try:
+        with open(tmp_path, "wb", buffering=1 << 20) as f:
+            f.write(b"<?xml version='1.0' encoding='utf-8'?>\n")
+            f.write(f'<Bundle xmlns="{FHIR_NS}"><type value="collection" />'.encode("utf-8"))
+            for res in _iter_latest_curated_json(conn, limit):
+                # the enclosing <Bundle> already declares the FHIR namespace
+                built = bundle_entry_to_xml_element({"resource": res}, mode=mode, declare_ns=False)
+                if not built.ok or built.xml_bytes is None:
+                    return ExportResult(False, built.message, count=0, out_path=out_path)
+                f.write(built.xml_bytes)
+                count += 1
+            f.write(b"</Bundle>")
+        os.replace(tmp_path, out_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return ExportResult(True, f"Exported {count} resources to {out_path} (mode={mode})", count=count, out_path=out_path)
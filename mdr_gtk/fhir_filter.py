@@ -12,37 +12,80 @@ class CuratedFilter:
     limit: int = 500
 
 
-def build_curated_query(f: CuratedFilter) -> tuple[str, list[Any]]:
+_BASE_SQL = (
+    "SELECT resource_type, IFNULL(canonical_url, logical_id) as ident, IFNULL(artifact_version,'') as ver, "
+    "has_conflict, last_seen_ts "
+    "FROM fhir_curated_resource"
+)
+
+# WHERE fragments by bit: 1 = resource_type, 2 = text (LIKE scan), 4 = conflicts_only,
+# 8 = text via the fhir_curated_fts trigram index (see db.ensure_curated_fts).
+# SQLite LIKE is case-insensitive for ASCII; compare the bare columns so no
+# per-row lower()/IFNULL() evaluation is needed (NULL simply does not match)
+_FRAGMENTS = (
+    (1, "resource_type = ?"),
+    (2, "(canonical_url LIKE ? COLLATE NOCASE OR logical_id LIKE ? COLLATE NOCASE)"),
+    (8, "curated_id IN (SELECT rowid FROM fhir_curated_fts WHERE fhir_curated_fts MATCH ?)"),
+    (4, "has_conflict = 1"),
+)
+
+# The trigram tokenizer cannot match needles shorter than one trigram.
+_FTS_MIN_LEN = 3
+
+
+def _compose_sql(mask: int) -> str:
+    where = [frag for bit, frag in _FRAGMENTS if mask & bit]
+    sql = _BASE_SQL
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql + " ORDER BY last_seen_ts DESC LIMIT ?"
+
+
+# Only 16 filter combinations exist; build every statement once at import so the
+# filter-as-you-type path is a dict lookup (and always the same cached statement).
+_SQL_TEMPLATES: dict[int, str] = {mask: _compose_sql(mask) for mask in range(16)}
+
+
+def _fts_phrase(text: str) -> str:
+    # A quoted FTS5 string is a literal; with the trigram tokenizer it matches
+    # as a case-insensitive substring, same as the LIKE variant.
+    return '"' + text.replace('"', '""') + '"'
+
+
+def build_curated_query(f: CuratedFilter, *, use_fts: bool = False) -> tuple[str, list[Any]]:
     """Return SQL + params for curated list view.
 
     Filters:
     - resource_type: exact match
     - text: case-insensitive substring on canonical_url/logical_id
     - conflicts_only: has_conflict=1
+
+    With ``use_fts`` (see :func:`mdr_gtk.db.has_curated_fts`) the text filter is
+    answered from the ``fhir_curated_fts`` index instead of scanning the table;
+    needles shorter than three characters still use LIKE.
+
+    Listings can reach thousands of rows; callers should iterate the result in
+    batches (``cur = conn.cursor(); cur.arraysize = 256`` then
+    ``while rows := cur.fetchmany(): ...``) rather than row by row.
     """
-    where = []
+    mask = 0
     params: list[Any] = []
 
     if f.resource_type and f.resource_type.lower() not in ("all", "*"):
-        where.append("resource_type = ?")
+        mask |= 1
         params.append(f.resource_type)
 
-    if f.text and f.text.strip():
-        # SQLite LIKE is case-insensitive for ASCII by default; use lower() for robustness
-        where.append("(lower(IFNULL(canonical_url,'')) LIKE ? OR lower(IFNULL(logical_id,'')) LIKE ?)")
-        t = "%" + f.text.strip().lower() + "%"
+    text = f.text.strip() if f.text else ""
+    if text and use_fts and len(text) >= _FTS_MIN_LEN:
+        mask |= 8
+        params.append(_fts_phrase(text))
+    elif text:
+        mask |= 2
+        t = "%" + text.lower() + "%"
         params.extend([t, t])
 
     if f.conflicts_only:
-        where.append("has_conflict = 1")
+        mask |= 4
 
-    sql = (
-        "SELECT resource_type, IFNULL(canonical_url, logical_id) as ident, IFNULL(artifact_version,'') as ver, "
-        "has_conflict, last_seen_ts "
-        "FROM fhir_curated_resource"
-    )
-    if where:
-        sql += " WHERE " + " AND ".join(where)
-    sql += " ORDER BY last_seen_ts DESC LIMIT ?"
     params.append(int(f.limit))
-    return sql, params
+    return _SQL_TEMPLATES[mask], params
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import codecs
+import functools
 import hashlib
 import json
+import os
+import re
 from dataclasses import dataclass
-from typing import Any, Iterable, Optional, Tuple
+from typing import Any, Iterable, Iterator, Optional, Tuple
 
 import sqlite3
-import sys
+
+from mdr_gtk.util import json_dumps_bytes, json_dumps_canonical, json_loads
 
 
 CONFORMANCE_TYPES = {
@@ -18,11 +23,45 @@ CONFORMANCE_TYPES = {
 
 def stable_json(obj: Any) -> str:
     # Deterministic JSON serialization for stable SHA
-    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return json_dumps_canonical(obj).decode("utf-8")
+
+
+def sha256_bytes(data: bytes) -> str:
+    # Hex digest: resource_sha256 is a TEXT key shared with existing DBs, the
+    # GUI and fhir_repo lookups, so the digest is not stored as a BLOB.
+    return hashlib.sha256(data).hexdigest()
 
 
 def sha256_text(s: str) -> str:
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+    return sha256_bytes(s.encode("utf-8"))
+
+
+def canonical_sha256(obj: Any) -> str:
+    """SHA-256 (hex) of the canonical JSON form; same as ``sha256_text(stable_json(obj))``.
+
+    Hashes the canonical bytes directly, without the str round-trip.
+    """
+    return sha256_bytes(json_dumps_canonical(obj))
+
+
+def _payload_json(obj: Any) -> str:
+    # compact JSON text in original key order, as stored in the *_json columns
+    return json_dumps_bytes(obj).decode("utf-8")
+
+
+def _file_payload(data: bytes) -> Optional[str]:
+    """Text of a single-resource JSON file, stored as received; None if it can't be.
+
+    Only the stored payload comes from the file: the sha stays the canonical hash
+    of the parsed resource, so identical content still dedupes across whitespace /
+    key-order variations and against the same resource imported from a Bundle.
+    """
+    if data.startswith(codecs.BOM_UTF8):
+        return None  # SQLite's json_valid() rejects a BOM
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
 
 
 def iter_json_bundle_resources(bundle: dict[str, Any]) -> Iterable[Tuple[Optional[str], dict[str, Any]]]:
@@ -34,19 +73,173 @@ def iter_json_bundle_resources(bundle: dict[str, Any]) -> Iterable[Tuple[Optiona
             yield entry.get("fullUrl"), res
 
 
+def _iter_json_bundle_canonical(bundle: dict[str, Any], h) -> Iterator[Tuple[Optional[str], dict[str, Any], bytes]]:
+    """Like :func:`iter_json_bundle_resources`, also yielding each resource's canonical bytes.
+
+    Meanwhile the canonical JSON of the whole bundle is fed into the hash object
+    ``h`` (``h.hexdigest() == canonical_sha256(bundle)`` once exhausted), splicing
+    in the resource bytes instead of serializing every resource a second time.
+    This works because canonical JSON composes: a dict is ``{`` + its sorted
+    ``"key":value`` pairs + ``}``, however the values were produced.
+    """
+    if not all(type(k) is str for k in bundle):
+        h.update(json_dumps_canonical(bundle))
+        yield from ((u, res, json_dumps_canonical(res)) for u, res in iter_json_bundle_resources(bundle))
+        return
+    sep = b"{"
+    for key in sorted(bundle):
+        h.update(sep + json_dumps_canonical(key) + b":")
+        sep = b","
+        value = bundle[key]
+        if key != "entry" or type(value) is not list:
+            h.update(json_dumps_canonical(value))
+            if key == "entry":
+                # not a list: whatever iter_json_bundle_resources makes of it (usually nothing)
+                yield from ((u, res, json_dumps_canonical(res)) for u, res in iter_json_bundle_resources(bundle))
+            continue
+        esep = b"["
+        for entry in value:
+            h.update(esep)
+            esep = b","
+            found, entry_canon = _canonical_entry(entry)
+            h.update(entry_canon)
+            if found is not None:
+                yield found
+        h.update(b"]" if value else b"[]")
+    h.update(b"}")
+
+
+def _canonical_entry(entry: Any) -> Tuple[Optional[Tuple[Optional[str], dict[str, Any], bytes]], bytes]:
+    """``((full_url, resource, resource canonical bytes) or None, entry canonical bytes)``.
+
+    The entry's canonical JSON reuses the resource bytes; the first item is None
+    for entries iter_json_bundle_resources would skip.
+    """
+    res = entry.get("resource") if isinstance(entry, dict) else None
+    is_resource = isinstance(res, dict) and bool(res.get("resourceType"))
+    if not is_resource or not all(type(k) is str for k in entry):
+        found = (entry.get("fullUrl"), res, json_dumps_canonical(res)) if is_resource else None
+        return found, json_dumps_canonical(entry)
+    canon = json_dumps_canonical(res)
+    entry_canon = b"{" + b",".join(
+        json_dumps_canonical(ek) + b":" + (canon if ek == "resource" else json_dumps_canonical(entry[ek]))
+        for ek in sorted(entry)
+    ) + b"}"
+    return (entry.get("fullUrl"), res, canon), entry_canon
+
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WS = re.compile(r"[ \t\n\r]*")
+# yielded by _iter_json_bundle_text where the entry array starts
+_ENTRY_ARRAY = object()
+
+
+class _NotStreamable(Exception):
+    """The bundle text needs the whole-document path; see _iter_json_bundle_text."""
+
+
+def _iter_json_bundle_text(text: str) -> Iterator[Tuple[Optional[str], Any]]:
+    """Walk the top-level JSON object in ``text`` without building it.
+
+    Yields ``(key, value)`` per top-level member, except that for ``entry`` it
+    yields ``("entry", _ENTRY_ARRAY)`` followed by ``(None, entry)`` per array
+    element, each parsed on its own, so only one entry tree is alive at a time.
+    Invalid JSON raises json.JSONDecodeError, like json.loads. Documents where
+    member-by-member reading could differ from json.loads (not an object,
+    repeated or non-array ``entry``) raise _NotStreamable, possibly after some
+    entries were yielded; the caller then starts over with json.loads.
+    """
+    ws = _JSON_WS.match
+    decode = _JSON_DECODER.raw_decode
+    i = ws(text).end()
+    if text[i:i + 1] != "{":
+        raise _NotStreamable()
+    i = ws(text, i + 1).end()
+    seen_entry = False
+    if text[i:i + 1] == "}":
+        i += 1
+    else:
+        while True:
+            if text[i:i + 1] != '"':
+                raise json.JSONDecodeError("Expecting property name enclosed in double quotes", text, i)
+            key, i = json.decoder.scanstring(text, i + 1)
+            i = ws(text, i).end()
+            if text[i:i + 1] != ":":
+                raise json.JSONDecodeError("Expecting ':' delimiter", text, i)
+            i = ws(text, i + 1).end()
+            if key == "entry":
+                if seen_entry or text[i:i + 1] != "[":
+                    # json.loads keeps the last "entry"; entries already imported would be wrong
+                    raise _NotStreamable()
+                seen_entry = True
+                yield key, _ENTRY_ARRAY
+                i = ws(text, i + 1).end()
+                if text[i:i + 1] == "]":
+                    i += 1
+                else:
+                    while True:
+                        entry, i = decode(text, i)
+                        yield None, entry
+                        i = ws(text, i).end()
+                        c = text[i:i + 1]
+                        if c == "]":
+                            i += 1
+                            break
+                        if c != ",":
+                            raise json.JSONDecodeError("Expecting ',' delimiter", text, i)
+                        i = ws(text, i + 1).end()
+            else:
+                value, i = decode(text, i)
+                yield key, value
+            i = ws(text, i).end()
+            c = text[i:i + 1]
+            if c == "}":
+                i += 1
+                break
+            if c != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", text, i)
+            i = ws(text, i + 1).end()
+    if ws(text, i).end() != len(text):
+        raise json.JSONDecodeError("Extra data", text, i)
+
+
+def _join_path(base_path: str, parts: list) -> str:
+    # str parts are dict keys ("a.b"), int parts are list indexes ("a[0]")
+    path = base_path
+    for seg in parts:
+        if type(seg) is int:
+            path = f"{path}[{seg}]"
+        else:
+            path = f"{path}.{seg}" if path else seg
+    return path
+
+
 def ref_edges(obj: Any, base_path: str = "") -> Iterable[Tuple[str, str]]:
     # yields (path, reference_string) for dicts with {"reference": "..."}
-    if isinstance(obj, dict):
-        for k, v in obj.items():
-            p = f"{base_path}.{k}" if base_path else k
-            if k == "reference" and isinstance(v, str):
-                yield (base_path, v)
-            else:
-                yield from ref_edges(v, p)
-    elif isinstance(obj, list):
-        for i, v in enumerate(obj):
-            p = f"{base_path}[{i}]"
-            yield from ref_edges(v, p)
+    # Iterative depth-first walk in document order; the path string is only built
+    # for nodes that actually carry a reference.
+    if type(obj) is dict:
+        stack = [(True, iter(obj.items()))]
+    elif type(obj) is list:
+        stack = [(False, enumerate(obj))]
+    else:
+        return
+    parts: list = []  # key/index leading to each non-root frame on the stack
+    while stack:
+        is_dict, it = stack[-1]
+        for k, v in it:
+            if is_dict and k == "reference" and type(v) is str:
+                yield (_join_path(base_path, parts), v)
+                continue
+            t = type(v)
+            if t is dict or t is list:
+                parts.append(k)
+                stack.append((t is dict, iter(v.items()) if t is dict else enumerate(v)))
+                break
+        else:
+            stack.pop()
+            if parts:
+                parts.pop()
 
 
 @dataclass
@@ -57,27 +250,70 @@ class ImportResult:
     raw_count: int = 0
 
 
+# Statements of the ingest hot path, built once. Together with db.connect's larger
+# statement cache every execute below reuses an already prepared statement.
+_SQL_INSERT_RUN = "INSERT INTO fhir_ingest_run(source_name, source_kind, fhir_major, partition_key) VALUES (?,?,?,?)"
+_SQL_FINISH_RUN = "UPDATE fhir_ingest_run SET finished_ts=(strftime('%Y-%m-%dT%H:%M:%fZ','now')) WHERE run_id=?"
+_SQL_INSERT_BUNDLE = "INSERT INTO fhir_raw_bundle(run_id, bundle_type, bundle_sha256, bundle_json) VALUES (?,?,?,?)"
+_SQL_SET_BUNDLE_TYPE = "UPDATE fhir_raw_bundle SET bundle_type=? WHERE bundle_id=?"
+_SQL_SET_BUNDLE_SHA = "UPDATE fhir_raw_bundle SET bundle_sha256=? WHERE bundle_id=?"
+_SQL_INSERT_RAW_RESOURCE = """INSERT INTO fhir_raw_resource(
+    run_id, bundle_id, full_url,
+    resource_type, logical_id, canonical_url, artifact_version,
+    meta_version_id, meta_last_updated,
+    resource_sha256, resource_json
+) VALUES (?,?,?,?,?,?,?,?,?,?,?)"""
+_SQL_INSERT_CURATED = """INSERT INTO fhir_curated_resource(
+    resource_type, logical_id, canonical_url, artifact_version, partition_key,
+    current_sha256, has_conflict
+) VALUES (?,?,?,?,?,?,0)"""
+_SQL_UPSERT_VARIANT = (
+    "INSERT INTO fhir_curated_variant(curated_id, resource_sha256, occurrences, first_seen_run_id, last_seen_run_id) "
+    "VALUES (?,?,1,?,?) "
+    "ON CONFLICT(curated_id, resource_sha256) DO UPDATE SET "
+    "occurrences=occurrences+1, last_seen_run_id=excluded.last_seen_run_id"
+)
+# upsert, not REPLACE: REPLACE is a DELETE + INSERT (index rewrite, FK cascade checks)
+_SQL_UPSERT_RAW_TO_CURATED = (
+    "INSERT INTO fhir_raw_to_curated(raw_id, curated_id) VALUES (?,?) "
+    "ON CONFLICT(raw_id) DO UPDATE SET curated_id=excluded.curated_id"
+)
+# Reference edges are staged in a connection-private TEMP table during the import
+# and appended to fhir_reference_edge in one INSERT ... SELECT when the batch is
+# closed: the staging table has no constraints or indexes, so the per-row work
+# (FK checks, run_id index) happens once, in a single statement.
+_SQL_CREATE_EDGE_STAGE = (
+    "CREATE TEMP TABLE IF NOT EXISTS tmp_fhir_reference_edge("
+    "run_id INTEGER, from_raw_id INTEGER, from_path TEXT, to_reference TEXT)"
+)
+_SQL_STAGE_REFERENCE_EDGE = "INSERT INTO tmp_fhir_reference_edge VALUES (?,?,?,?)"
+_SQL_INSERT_REFERENCE_EDGES = (
+    "INSERT INTO fhir_reference_edge(run_id, from_raw_id, from_path, to_reference) "
+    "SELECT run_id, from_raw_id, from_path, to_reference FROM tmp_fhir_reference_edge ORDER BY rowid"
+)
+_SQL_CLEAR_EDGE_STAGE = "DELETE FROM tmp_fhir_reference_edge"
+
+
 def _new_run(conn: sqlite3.Connection, source_name: str, source_kind: str, partition_key: Optional[str]) -> int:
-    cur = conn.execute(
-        "INSERT INTO fhir_ingest_run(source_name, source_kind, fhir_major, partition_key) VALUES (?,?,?,?)",
-        (source_name, source_kind, "R4", partition_key),
-    )
+    # The whole import is one transaction, committed by _finish_run. Take the write
+    # lock up front: a deferred transaction that has to upgrade later can fail with
+    # SQLITE_BUSY while another connection (e.g. the GUI) is reading.
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    cur = conn.execute(_SQL_INSERT_RUN, (source_name, source_kind, "R4", partition_key))
     return int(cur.lastrowid)
 
 
 def _finish_run(conn: sqlite3.Connection, run_id: int) -> None:
-    conn.execute("UPDATE fhir_ingest_run SET finished_ts=(strftime('%Y-%m-%dT%H:%M:%fZ','now')) WHERE run_id=?", (run_id,))
+    conn.execute(_SQL_FINISH_RUN, (run_id,))
     conn.commit()
 
 
-def _insert_bundle(conn: sqlite3.Connection, run_id: int, bundle: dict[str, Any]) -> int:
-    bjson = json.dumps(bundle, ensure_ascii=False)
-    bsha = sha256_text(stable_json(bundle))
+def _insert_bundle(cur: sqlite3.Cursor, run_id: int, bundle: dict[str, Any], raw_json: Optional[str] = None) -> int:
+    # bundle_sha256 is set by the caller once the entries have been hashed
+    bjson = raw_json if raw_json is not None else _payload_json(bundle)
     btype = bundle.get("type")
-    cur = conn.execute(
-        "INSERT INTO fhir_raw_bundle(run_id, bundle_type, bundle_sha256, bundle_json) VALUES (?,?,?,?)",
-        (run_id, btype, bsha, bjson),
-    )
+    cur.execute(_SQL_INSERT_BUNDLE, (run_id, btype, None, bjson))
     return int(cur.lastrowid)
 
 
@@ -88,50 +324,196 @@ def _identity_key(resource_type: str, logical_id: Optional[str], canonical_url:
     return ("logical", resource_type, logical_id or "", partition_key or "")
 
 
-def _find_curated(conn: sqlite3.Connection, key):
-    if key[0] == "canonical":
-        _, rt, url, ver, part = key
-        return conn.execute(
-            """SELECT curated_id, current_sha256 FROM fhir_curated_resource
-                 WHERE resource_type=? AND canonical_url=? AND IFNULL(artifact_version,'')=? AND IFNULL(partition_key,'')=?""",
-            (rt, url, ver, part),
-        ).fetchone()
-    else:
-        _, rt, lid, part = key
-        return conn.execute(
-            """SELECT curated_id, current_sha256 FROM fhir_curated_resource
-                 WHERE resource_type=? AND logical_id=? AND IFNULL(partition_key,'')=?""",
-            (rt, lid, part),
-        ).fetchone()
-
-
-def _create_curated(conn: sqlite3.Connection, resource_type: str, logical_id: Optional[str], canonical_url: Optional[str], artifact_version: Optional[str],
-                    partition_key: Optional[str], current_sha256: str) -> int:
-    cur = conn.execute(
-        """INSERT INTO fhir_curated_resource(
-              resource_type, logical_id, canonical_url, artifact_version, partition_key,
-              current_sha256, has_conflict
-            ) VALUES (?,?,?,?,?,?,0)""",
-        (resource_type, logical_id, canonical_url, artifact_version, partition_key, current_sha256),
+# Resolve many identity keys of one kind in one statement: the keys (key[1:]) come
+# in as a VALUES list joined against the identity indexes, so each key is still an
+# index probe. ``k.i`` is the position of the key in the request.
+_RESOLVE_CURATED_JOIN = {
+    "canonical": "c.resource_type=k.rt AND c.canonical_url=k.id AND IFNULL(c.artifact_version,'')=k.ver "
+                 "AND IFNULL(c.partition_key,'')=k.pk",
+    "logical": "c.resource_type=k.rt AND c.logical_id=k.id AND IFNULL(c.partition_key,'')=k.pk",
+}
+_RESOLVE_CURATED_COLS = {"canonical": "i, rt, id, ver, pk", "logical": "i, rt, id, pk"}
+# keys per statement: at most 5 params each keeps below the 999-variable limit of old SQLite builds
+_RESOLVE_CHUNK = 150
+
+
+@functools.lru_cache(maxsize=None)
+def _sql_resolve_curated(kind: str, n: int) -> str:
+    # memoized: every full chunk asks for the same (kind, _RESOLVE_CHUNK) text,
+    # so flushes skip rebuilding the VALUES list
+    cols = _RESOLVE_CURATED_COLS[kind]
+    row = "(" + ",".join("?" * (cols.count(",") + 1)) + ")"
+    return (
+        f"WITH k({cols}) AS (VALUES {','.join([row] * n)}) "
+        f"SELECT k.i, MIN(c.curated_id), c.current_sha256 FROM k "
+        f"JOIN fhir_curated_resource c ON {_RESOLVE_CURATED_JOIN[kind]} GROUP BY k.i"
     )
-    return int(cur.lastrowid)
 
 
-def _upsert_variant(conn: sqlite3.Connection, curated_id: int, sha: str, run_id: int) -> None:
-    row = conn.execute(
-        "SELECT occurrences FROM fhir_curated_variant WHERE curated_id=? AND resource_sha256=?",
-        (curated_id, sha),
-    ).fetchone()
-    if row:
-        conn.execute(
-            "UPDATE fhir_curated_variant SET occurrences=occurrences+1, last_seen_run_id=? WHERE curated_id=? AND resource_sha256=?",
-            (run_id, curated_id, sha),
-        )
-    else:
-        conn.execute(
-            "INSERT INTO fhir_curated_variant(curated_id, resource_sha256, occurrences, first_seen_run_id, last_seen_run_id) VALUES (?,?,?,?,?)",
-            (curated_id, sha, 1, run_id, run_id),
-        )
+# Existing curated row seen again: flag a conflict when the content differs from
+# its current sha and bump last_seen_ts.
+_TOUCH_CURATED_BY_ID = (
+    "UPDATE fhir_curated_resource "
+    "SET has_conflict = CASE WHEN current_sha256 <> ? THEN 1 ELSE has_conflict END, "
+    "last_seen_ts = (strftime('%Y-%m-%dT%H:%M:%fZ','now')) "
+    "WHERE curated_id=?"
+)
+
+
+def _resolve_curated(cur: sqlite3.Cursor, keys: list[tuple]) -> dict[tuple, tuple[int, str]]:
+    """Map each identity key that has a curated row to ``(curated_id, current_sha256)``."""
+    by_kind: dict[str, list[tuple]] = {kind: [] for kind in _RESOLVE_CURATED_JOIN}
+    for k in keys:
+        by_kind[k[0]].append(k)
+    found: dict[tuple, tuple[int, str]] = {}
+    for kind, of_kind in by_kind.items():
+        for lo in range(0, len(of_kind), _RESOLVE_CHUNK):
+            chunk = of_kind[lo:lo + _RESOLVE_CHUNK]
+            params = [v for i, k in enumerate(chunk) for v in (i, *k[1:])]
+            for i, curated_id, current_sha in cur.execute(_sql_resolve_curated(kind, len(chunk)), params):
+                found[chunk[i]] = (int(curated_id), current_sha)
+    return found
+
+
+def _json_fields(res: dict[str, Any]) -> tuple[str, Optional[str], Optional[str], Optional[str], Optional[str], Optional[str]]:
+    """Return (resource_type, logical_id, canonical_url, artifact_version, meta_version_id, meta_last_updated)."""
+    # Runs once per resource: one dict lookup per field, no repeated .get() for the type checks.
+    get = res.get
+    rt = str(get("resourceType"))
+    logical_id = get("id")
+    if not isinstance(logical_id, str):
+        logical_id = None
+    canonical_url = get("url")
+    if not isinstance(canonical_url, str):
+        canonical_url = None
+    artifact_version = get("version")
+    if not isinstance(artifact_version, str):
+        artifact_version = None
+
+    meta = get("meta")
+    meta_version_id = meta_last_updated = None
+    if isinstance(meta, dict):
+        meta_version_id = meta.get("versionId")
+        if not isinstance(meta_version_id, str):
+            meta_version_id = None
+        meta_last_updated = meta.get("lastUpdated")
+        if not isinstance(meta_last_updated, str):
+            meta_last_updated = None
+    return rt, logical_id, canonical_url, artifact_version, meta_version_id, meta_last_updated
+
+
+# Raw resources are buffered and written with executemany in chunks of this size.
+_FLUSH_EVERY = 500
+
+
+class _RawBatch:
+    """Collects the raw resources of one ingest run and writes them in batches.
+
+    ``add`` only buffers the extracted/hashed row. ``flush`` then works phase by
+    phase over the whole buffer: insert the raw rows, resolve all distinct
+    curated identities with a few bulk lookups, create the missing curated rows,
+    and write touches, variants and links, each with a single executemany.
+    Reference edges are staged (see _SQL_CREATE_EDGE_STAGE) and only reach
+    fhir_reference_edge in ``close``, which the importer calls instead of a
+    final ``flush``. All statements go through the importer's cursor.
+
+    ``curated_cache`` maps identity keys already resolved in this import to
+    ``(curated_id, current_sha256)``; ingest never changes current_sha256, so the
+    entries stay valid for the whole run.
+    """
+
+    def __init__(self, cur: sqlite3.Cursor, run_id: int, partition_key: Optional[str]):
+        self.cur = cur
+        self.run_id = run_id
+        self.partition_key = partition_key
+        self.count = 0
+        self.curated_cache: dict[tuple, tuple[int, str]] = {}
+        self._raw_rows: list[tuple] = []
+        self._edges: list[tuple[int, str, str]] = []  # (row index in batch, from_path, to_reference)
+        self._edges_staged = False
+
+    def add(self, bundle_id: Optional[int], full_url: Optional[str],
+            fields: tuple[str, Optional[str], Optional[str], Optional[str], Optional[str], Optional[str]],
+            sha: str, payload: str, refs: Iterable[Tuple[str, str]] = ()) -> None:
+        i = len(self._raw_rows)
+        self._raw_rows.append((self.run_id, bundle_id, full_url, *fields, sha, payload))
+        self._edges.extend((i, path, ref) for path, ref in refs)
+        self.count += 1
+        if i + 1 >= _FLUSH_EVERY:
+            self.flush()
+
+    def flush(self) -> None:
+        rows = self._raw_rows
+        if not rows:
+            return
+        cur = self.cur
+        run_id = self.run_id
+        pk = self.partition_key
+        cache = self.curated_cache
+
+        cur.executemany(_SQL_INSERT_RAW_RESOURCE, rows)
+        # raw_id is the rowid: one statement inside our write transaction assigns
+        # consecutive ids, so the batch spans [last - n + 1, last]
+        first_id = int(cur.execute("SELECT last_insert_rowid()").fetchone()[0]) - len(rows) + 1
+
+        keys = [_identity_key(row[3], row[4], row[5], row[6], pk) for row in rows]
+        shas = [row[9] for row in rows]
+        existing = _resolve_curated(cur, [k for k in dict.fromkeys(keys) if k not in cache])
+
+        # Decide per row in Python: touch a known row, or create a new one for the
+        # first occurrence of an unknown key. Until the INSERT has run, a new row's
+        # id is the placeholder ~index into ``creates`` (always negative).
+        touches: list[tuple[str, int]] = []
+        creates: list[tuple] = []
+        ids: list[int] = []
+        for key, row, sha in zip(keys, rows, shas):
+            hit = cache.get(key)
+            if hit is None:
+                hit = existing.pop(key, None)
+                if hit is not None:
+                    touches.append((sha, hit[0]))
+                else:
+                    hit = (~len(creates), sha)
+                    creates.append((row[3], row[4], row[5], row[6], pk, sha))
+                cache[key] = hit
+            elif sha != hit[1]:
+                touches.append((sha, hit[0]))
+            # else: same content again, the row was already touched earlier in this run
+            ids.append(hit[0])
+
+        if creates:
+            cur.executemany(_SQL_INSERT_CURATED, creates)
+            # curated_id is the rowid as well; trigger inserts (FTS) do not move last_insert_rowid
+            first_curated = int(cur.execute("SELECT last_insert_rowid()").fetchone()[0]) - len(creates) + 1
+            ids = [first_curated + ~cid if cid < 0 else cid for cid in ids]
+            touches = [(sha, first_curated + ~cid if cid < 0 else cid) for sha, cid in touches]
+            for key, (cid, current_sha) in cache.items():
+                if cid < 0:
+                    cache[key] = (first_curated + ~cid, current_sha)
+
+        if touches:
+            cur.executemany(_TOUCH_CURATED_BY_ID, touches)
+        cur.executemany(_SQL_UPSERT_VARIANT, [(cid, sha, run_id, run_id) for cid, sha in zip(ids, shas)])
+        cur.executemany(_SQL_UPSERT_RAW_TO_CURATED, [(first_id + i, cid) for i, cid in enumerate(ids)])
+
+        if self._edges:
+            if not self._edges_staged:
+                cur.execute(_SQL_CREATE_EDGE_STAGE)
+                self._edges_staged = True
+            cur.executemany(
+                _SQL_STAGE_REFERENCE_EDGE,
+                [(run_id, first_id + i, path, ref) for i, path, ref in self._edges],
+            )
+        self._raw_rows = []
+        self._edges = []
+
+    def close(self) -> None:
+        """Flush the remaining rows and move the staged edges into fhir_reference_edge."""
+        self.flush()
+        if self._edges_staged:
+            self.cur.execute(_SQL_INSERT_REFERENCE_EDGES)
+            self.cur.execute(_SQL_CLEAR_EDGE_STAGE)
+            self._edges_staged = False
 
 
 def import_fhir_bundle_json(
@@ -141,122 +523,291 @@ def import_fhir_bundle_json(
     source_name: str = "bundle",
     partition_key: Optional[str] = None,
     extract_references: bool = True,
+    raw_json: Optional[str] = None,
 ) -> ImportResult:
+    """Import a parsed FHIR Bundle.
+
+    ``raw_json`` is the JSON text ``bundle`` was parsed from, if the caller has
+    it: it is stored as bundle_json as received instead of serializing the whole
+    bundle again. The bundle sha is the canonical hash either way.
+    """
     if not isinstance(bundle, dict) or bundle.get("resourceType") != "Bundle":
         return ImportResult(False, "Not a FHIR Bundle JSON object")
 
     run_id = _new_run(conn, source_name=source_name, source_kind="bundle", partition_key=partition_key)
     try:
-        bundle_id = _insert_bundle(conn, run_id, bundle)
-        raw_n = 0
-
-        for full_url, res in iter_json_bundle_resources(bundle):
-            rt = str(res.get("resourceType"))
-            logical_id = res.get("id") if isinstance(res.get("id"), str) else None
-            canonical_url = res.get("url") if isinstance(res.get("url"), str) else None
-            artifact_version = res.get("version") if isinstance(res.get("version"), str) else None
-
-            meta = res.get("meta") if isinstance(res.get("meta"), dict) else {}
-            meta_version_id = meta.get("versionId") if isinstance(meta.get("versionId"), str) else None
-            meta_last_updated = meta.get("lastUpdated") if isinstance(meta.get("lastUpdated"), str) else None
-
-            rjson = json.dumps(res, ensure_ascii=False)
-            sha = sha256_text(stable_json(res))
-
-            cur = conn.execute(
-                """INSERT INTO fhir_raw_resource(
-                    run_id, bundle_id, full_url,
-                    resource_type, logical_id, canonical_url, artifact_version,
-                    meta_version_id, meta_last_updated,
-                    resource_sha256, resource_json
-                ) VALUES (?,?,?,?,?,?,?,?,?,?,?)""",
-                (
-                    run_id, bundle_id, full_url,
-                    rt, logical_id, canonical_url, artifact_version,
-                    meta_version_id, meta_last_updated,
-                    sha, rjson,
-                ),
-            )
-            raw_id = int(cur.lastrowid)
-
-            key = _identity_key(rt, logical_id, canonical_url, artifact_version, partition_key)
-            found = _find_curated(conn, key)
-            if found:
-                curated_id, current_sha = int(found[0]), found[1]
-                _upsert_variant(conn, curated_id, sha, run_id)
-                # conflict if new sha differs
-                if current_sha != sha:
-                    conn.execute("UPDATE fhir_curated_resource SET has_conflict=1 WHERE curated_id=?", (curated_id,))
-                conn.execute(
-                    "UPDATE fhir_curated_resource SET last_seen_ts=(strftime('%Y-%m-%dT%H:%M:%fZ','now')) WHERE curated_id=?",
-                    (curated_id,),
-                )
-            else:
-                curated_id = _create_curated(conn, rt, logical_id, canonical_url, artifact_version, partition_key, sha)
-                conn.execute(
-                    "INSERT INTO fhir_curated_variant(curated_id, resource_sha256, occurrences, first_seen_run_id, last_seen_run_id) VALUES (?,?,?,?,?)",
-                    (curated_id, sha, 1, run_id, run_id),
-                )
-
-            conn.execute(
-                "INSERT OR REPLACE INTO fhir_raw_to_curated(raw_id, curated_id) VALUES (?,?)",
-                (raw_id, curated_id),
-            )
+        cur = conn.cursor()
+        bundle_id = _insert_bundle(cur, run_id, bundle, raw_json)
+        batch = _RawBatch(cur, run_id, partition_key)
+
+        # one canonical serialization per resource, shared by its sha and the bundle's
+        bundle_hash = hashlib.sha256()
+        for full_url, res, canon in _iter_json_bundle_canonical(bundle, bundle_hash):
+            rjson = _payload_json(res)
+            sha = sha256_bytes(canon)
+            batch.add(bundle_id, full_url, _json_fields(res), sha, rjson,
+                      ref_edges(res) if extract_references else ())
+        cur.execute(_SQL_SET_BUNDLE_SHA, (bundle_hash.hexdigest(), bundle_id))
+
+        batch.close()
+        raw_n = batch.count
+
+        _finish_run(conn, run_id)
+        return ImportResult(True, f"Imported FHIR Bundle: run_id={run_id}, resources={raw_n}", run_id=run_id, raw_count=raw_n)
+
+    except Exception as e:
+        conn.rollback()
+        return ImportResult(False, f"Import failed: {e}", run_id=run_id, raw_count=0)
 
-            if extract_references:
-                for path, ref in ref_edges(res):
-                    conn.execute(
-                        "INSERT INTO fhir_reference_edge(run_id, from_raw_id, from_path, to_reference) VALUES (?,?,?,?)",
-                        (run_id, raw_id, path, ref),
-                    )
 
-            raw_n += 1
+def import_fhir_bundle_json_text(
+    conn: sqlite3.Connection,
+    text: str,
+    *,
+    source_name: str = "bundle",
+    partition_key: Optional[str] = None,
+    extract_references: bool = True,
+) -> ImportResult:
+    """Import a FHIR Bundle from its JSON text, parsing one entry at a time.
+
+    Same result as ``import_fhir_bundle_json(conn, json.loads(text), raw_json=text)``,
+    but the parsed bundle is never held as a whole: peak memory is the text plus
+    one entry (and the entries' canonical bytes for the bundle sha). Invalid JSON
+    gives a failed ImportResult.
+    """
+    run_id = _new_run(conn, source_name=source_name, source_kind="bundle", partition_key=partition_key)
+    try:
+        cur = conn.cursor()
+        # type is only known once its member has been read
+        bundle_id = int(cur.execute(_SQL_INSERT_BUNDLE, (run_id, None, None, text)).lastrowid)
+        batch = _RawBatch(cur, run_id, partition_key)
+
+        members: dict[str, Any] = {}
+        entry_canon: Optional[list[bytes]] = None
+        for key, value in _iter_json_bundle_text(text):
+            if key is None:
+                found, canon_entry = _canonical_entry(value)
+                entry_canon.append(canon_entry)
+                if found is not None:
+                    full_url, res, canon = found
+                    batch.add(bundle_id, full_url, _json_fields(res), sha256_bytes(canon), _payload_json(res),
+                              ref_edges(res) if extract_references else ())
+            elif value is _ENTRY_ARRAY:
+                entry_canon = []
+            else:
+                members[key] = value
+        if members.get("resourceType") != "Bundle":
+            conn.rollback()
+            return ImportResult(False, "Not a FHIR Bundle JSON object")
+
+        # canonical bundle JSON: sorted members, the entry array spliced from its parts
+        bundle_hash = hashlib.sha256()
+        sep = b"{"
+        for key in sorted([*members, "entry"] if entry_canon is not None else members):
+            bundle_hash.update(sep + json_dumps_canonical(key) + b":")
+            sep = b","
+            if key == "entry":
+                bundle_hash.update(b"[" + b",".join(entry_canon) + b"]")
+            else:
+                bundle_hash.update(json_dumps_canonical(members[key]))
+        bundle_hash.update(b"}")
+        cur.execute(_SQL_SET_BUNDLE_TYPE, (members.get("type"), bundle_id))
+        cur.execute(_SQL_SET_BUNDLE_SHA, (bundle_hash.hexdigest(), bundle_id))
+
+        batch.close()
+        raw_n = batch.count
 
-        conn.commit()
         _finish_run(conn, run_id)
         return ImportResult(True, f"Imported FHIR Bundle: run_id={run_id}, resources={raw_n}", run_id=run_id, raw_count=raw_n)
 
+    except _NotStreamable:
+        conn.rollback()
     except Exception as e:
         conn.rollback()
         return ImportResult(False, f"Import failed: {e}", run_id=run_id, raw_count=0)
 
+    try:
+        bundle = json_loads(text)
+    except ValueError as e:
+        return ImportResult(False, f"Import failed: {e}")
+    return import_fhir_bundle_json(conn, bundle, source_name=source_name, partition_key=partition_key,
+                                   extract_references=extract_references, raw_json=text)
+
+import collections
+import contextlib
+import itertools
+import posixpath
 import tarfile
-import tempfile
 from pathlib import Path
 
+_PACKAGE_SKIP_NAMES = ("package.json", ".index.json")
+
+
+def _walk_package_json(root: str) -> list[str]:
+    """Paths of the resource JSON files under ``root``, in the order rglob('*.json') yields them.
+
+    One os.scandir() per directory (rglob lists each directory twice) and plain
+    strings instead of Path objects. Per directory: its files first, then its
+    subdirectories, depth-first; symlinked directories are not followed.
+    """
+    out: list[str] = []
+
+    def walk(d: str) -> None:
+        try:
+            with os.scandir(d) as it:
+                entries = list(it)
+        except PermissionError:
+            return
+        subdirs = []
+        for e in entries:
+            if e.is_dir(follow_symlinks=False):
+                subdirs.append(e.path)
+            elif e.name.endswith(".json") and e.name not in _PACKAGE_SKIP_NAMES:
+                out.append(e.path)
+        for sd in subdirs:
+            walk(sd)
+
+    walk(str(root))
+    return out
+
+
 def iter_package_json_files(root: Path) -> list[Path]:
-    files = []
-    for p in root.rglob("*.json"):
-        if p.name in ("package.json", ".index.json"):
-            continue
-        files.append(p)
-    return files
+    return [Path(fp) for fp in _walk_package_json(str(root))]
 
 
-def _extract_tgz_to_temp(tgz_path: Path):
-    """Extract tgz to a TemporaryDirectory and return (root_path, tmpdir).
+def _iter_tgz_package_json(tgz_path: Path) -> Iterator[bytes]:
+    """Contents of the resource JSON files in a .tgz package, read straight from the archive.
+
+    Members are streamed in archive order, nothing is extracted to disk. As with
+    the npm layout, only files under ``package/`` are used when the archive has
+    that directory, otherwise every matching file is; matching files seen before
+    the first ``package/`` member are held back until that is known.
+    """
+    held: list[bytes] = []
+    in_package = False
+    with tarfile.open(tgz_path, "r|*") as tf:
+        for m in tf:
+            name = posixpath.normpath(m.name).lstrip("/")
+            top = name.split("/", 1)[0]
+            if top == "package" and not in_package:
+                in_package = True
+                held.clear()
+            if not m.isfile() or top == "..":
+                continue
+            base = name.rsplit("/", 1)[-1]
+            if not base.endswith(".json") or base in _PACKAGE_SKIP_NAMES:
+                continue
+            if top != "package" and in_package:
+                continue
+            f = tf.extractfile(m)
+            if f is None:
+                continue
+            data = f.read()
+            if top == "package":
+                yield data
+            else:
+                held.append(data)
+    yield from held
 
-    The caller MUST call tmpdir.cleanup() when done.
 
-    Keeping the TemporaryDirectory object alive prevents automatic cleanup
-    during the import.
+def _prep_package_json(data: bytes, extract_references: bool = False) -> list[tuple]:
+    """Parse, extract and hash one package JSON file (no DB access).
+
+    Returns one ``(full_url, fields, sha, payload, refs)`` tuple per resource;
+    files that are not FHIR resources yield an empty list.
     """
-    td = tempfile.TemporaryDirectory()
     try:
-        out = Path(td.name)
-        with tarfile.open(tgz_path, "r:*") as tf:
-            if sys.version_info >= (3, 12):
-                tf.extractall(out, filter="data")
-            else:
-                tf.extractall(out)
-        # npm packages usually have "package/"
-        root = out / "package" if (out / "package").exists() else out
-        return root, td
+        # bytes straight into the parser: no separate UTF-8 decode pass
+        obj = json_loads(data)
     except Exception:
-        td.cleanup()
-        raise
+        return []
+    if not isinstance(obj, dict) or not obj.get("resourceType"):
+        return []
+
+    if obj.get("resourceType") == "Bundle":
+        # treat bundles inside package as a bundle source, but keep run_id kind=package
+        entries = iter_json_bundle_resources(obj)
+        file_payload = None
+    else:
+        # normal resource: the file itself is the raw payload, no re-serialize
+        entries = ((None, obj),)
+        file_payload = _file_payload(data)
+
+    return [
+        (full_url, _json_fields(res), canonical_sha256(res), file_payload or _payload_json(res),
+         list(ref_edges(res)) if extract_references else ())
+        for full_url, res in entries
+    ]
 
 
+def _prep_package_file(path: str, extract_references: bool = False) -> list[tuple]:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return []
+    return _prep_package_json(data, extract_references)
+
+
+# Below this much input a worker pool costs more to start than it saves: spawning
+# it is ~0.2 s, while this process parses ~30 MB/s on its own.
+_PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+# files per task sent to a worker
+_PARALLEL_CHUNK = 32
+
+
+def _prep_chunk(prep, items: list) -> list[list[tuple]]:
+    return [prep(item) for item in items]
+
+
+def _package_item_size(item) -> int:
+    if isinstance(item, bytes):
+        return len(item)
+    try:
+        return os.path.getsize(item)
+    except OSError:
+        return 0
+
+
+def _map_package_files(items: Iterable, prep, workers: Optional[int]) -> Iterator[list[tuple]]:
+    """Yield ``prep(item)`` for each package file (a path or the file bytes), in order.
+
+    Parsing + hashing is CPU-bound and independent per file, so large packages
+    are fanned out to a process pool while the caller writes to the DB. Items are
+    pulled lazily: with ``workers=None`` the pool only starts once
+    _PARALLEL_MIN_BYTES of input have been seen, and only a couple of chunks per
+    worker are in flight, so a streamed archive is never held in memory whole.
+    ``spawn`` rather than ``fork``: the importing process may be the GUI, with
+    live threads.
+    """
+    it = iter(items)
+    if workers is None:
+        head = []
+        size = 0
+        for item in it:
+            head.append(item)
+            size += _package_item_size(item)
+            if size >= _PARALLEL_MIN_BYTES:
+                break
+        workers = (os.cpu_count() or 1) if size >= _PARALLEL_MIN_BYTES else 1
+        it = itertools.chain(head, it)
+    if workers <= 1:
+        yield from map(prep, it)
+        return
+    # imported here: multiprocessing is a sizable part of this module's import
+    # time, and only large package imports ever start the pool
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as ex:
+        pending: collections.deque = collections.deque()
+        for chunk in iter(lambda: list(itertools.islice(it, _PARALLEL_CHUNK)), []):
+            pending.append(ex.submit(_prep_chunk, prep, chunk))
+            if len(pending) > 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
 
 def import_fhir_package(
     conn: sqlite3.Connection,
@@ -265,170 +816,49 @@ def import_fhir_package(
     source_name: str = "package",
     partition_key: Optional[str] = None,
     extract_references: bool = False,
+    workers: Optional[int] = None,
 ) -> ImportResult:
     """Import a FHIR NPM package (.tgz/.tar.gz) or an unpacked directory.
 
     - imports all JSON resources with a `resourceType`
     - if a JSON file is a Bundle, imports its entries as resources
     - reference extraction is optional (default off for packages)
+    - ``workers``: processes for parsing/hashing; None picks cpu_count() for
+      large packages, 0/1 keeps everything in this process
     """
     p = Path(package_path)
     if not p.exists():
         return ImportResult(False, f"Missing package path: {p}")
 
     run_id = _new_run(conn, source_name=source_name, source_kind="package", partition_key=partition_key)
-    _td = None
     try:
-        root = p
         if p.is_file() and (p.suffix in (".tgz", ".gz") or p.name.endswith(".tar.gz")):
-            root, _td = _extract_tgz_to_temp(p)
-
-        files = iter_package_json_files(root)
-        raw_n = 0
-
-        for fp in files:
-            try:
-                obj = json.loads(fp.read_text(encoding="utf-8"))
-            except Exception:
-                continue
-            if not isinstance(obj, dict) or not obj.get("resourceType"):
-                continue
+            # archive members are read in memory, one at a time
+            files: Iterable = _iter_tgz_package_json(p)
+            prep = functools.partial(_prep_package_json, extract_references=extract_references)
+        else:
+            files = _walk_package_json(str(p))
+            prep = functools.partial(_prep_package_file, extract_references=extract_references)
+        batch = _RawBatch(conn.cursor(), run_id, partition_key)
+
+        n_files = 0
+        # closing(): on a DB error, shut the worker pool down before reporting
+        with contextlib.closing(_map_package_files(files, prep, workers)) as prepared_files:
+            for prepared in prepared_files:
+                n_files += 1
+                for full_url, fields, sha, payload, refs in prepared:
+                    batch.add(None, full_url, fields, sha, payload, refs)
+
+        batch.close()
+        raw_n = batch.count
 
-            if obj.get("resourceType") == "Bundle":
-                # treat bundles inside package as a bundle source, but keep run_id kind=package
-                for full_url, res in iter_json_bundle_resources(obj):
-                    rt = str(res.get("resourceType"))
-                    logical_id = res.get("id") if isinstance(res.get("id"), str) else None
-                    canonical_url = res.get("url") if isinstance(res.get("url"), str) else None
-                    artifact_version = res.get("version") if isinstance(res.get("version"), str) else None
-
-                    meta = res.get("meta") if isinstance(res.get("meta"), dict) else {}
-                    meta_version_id = meta.get("versionId") if isinstance(meta.get("versionId"), str) else None
-                    meta_last_updated = meta.get("lastUpdated") if isinstance(meta.get("lastUpdated"), str) else None
-
-                    rjson = json.dumps(res, ensure_ascii=False)
-                    sha = sha256_text(stable_json(res))
-
-                    cur = conn.execute(
-                        """INSERT INTO fhir_raw_resource(
-                            run_id, bundle_id, full_url,
-                            resource_type, logical_id, canonical_url, artifact_version,
-                            meta_version_id, meta_last_updated,
-                            resource_sha256, resource_json
-                        ) VALUES (?,?,?,?,?,?,?,?,?,?,?)""",
-                        (
-                            run_id, None, full_url,
-                            rt, logical_id, canonical_url, artifact_version,
-                            meta_version_id, meta_last_updated,
-                            sha, rjson,
-                        ),
-                    )
-                    raw_id = int(cur.lastrowid)
-
-                    key = _identity_key(rt, logical_id, canonical_url, artifact_version, partition_key)
-                    found = _find_curated(conn, key)
-                    if found:
-                        curated_id, current_sha = int(found[0]), found[1]
-                        _upsert_variant(conn, curated_id, sha, run_id)
-                        if current_sha != sha:
-                            conn.execute("UPDATE fhir_curated_resource SET has_conflict=1 WHERE curated_id=?", (curated_id,))
-                        conn.execute(
-                            "UPDATE fhir_curated_resource SET last_seen_ts=(strftime('%Y-%m-%dT%H:%M:%fZ','now')) WHERE curated_id=?",
-                            (curated_id,),
-                        )
-                    else:
-                        curated_id = _create_curated(conn, rt, logical_id, canonical_url, artifact_version, partition_key, sha)
-                        conn.execute(
-                            "INSERT INTO fhir_curated_variant(curated_id, resource_sha256, occurrences, first_seen_run_id, last_seen_run_id) VALUES (?,?,?,?,?)",
-                            (curated_id, sha, 1, run_id, run_id),
-                        )
-
-                    conn.execute(
-                        "INSERT OR REPLACE INTO fhir_raw_to_curated(raw_id, curated_id) VALUES (?,?)",
-                        (raw_id, curated_id),
-                    )
-
-                    if extract_references:
-                        for path, ref in ref_edges(res):
-                            conn.execute(
-                                "INSERT INTO fhir_reference_edge(run_id, from_raw_id, from_path, to_reference) VALUES (?,?,?,?)",
-                                (run_id, raw_id, path, ref),
-                            )
-                    raw_n += 1
-                continue
-
-            # normal resource
-            rt = str(obj.get("resourceType"))
-            logical_id = obj.get("id") if isinstance(obj.get("id"), str) else None
-            canonical_url = obj.get("url") if isinstance(obj.get("url"), str) else None
-            artifact_version = obj.get("version") if isinstance(obj.get("version"), str) else None
-
-            meta = obj.get("meta") if isinstance(obj.get("meta"), dict) else {}
-            meta_version_id = meta.get("versionId") if isinstance(meta.get("versionId"), str) else None
-            meta_last_updated = meta.get("lastUpdated") if isinstance(meta.get("lastUpdated"), str) else None
-
-            rjson = json.dumps(obj, ensure_ascii=False)
-            sha = sha256_text(stable_json(obj))
-
-            cur = conn.execute(
-                """INSERT INTO fhir_raw_resource(
-                    run_id, bundle_id, full_url,
-                    resource_type, logical_id, canonical_url, artifact_version,
-                    meta_version_id, meta_last_updated,
-                    resource_sha256, resource_json
-                ) VALUES (?,?,?,?,?,?,?,?,?,?,?)""",
-                (
-                    run_id, None, None,
-                    rt, logical_id, canonical_url, artifact_version,
-                    meta_version_id, meta_last_updated,
-                    sha, rjson,
-                ),
-            )
-            raw_id = int(cur.lastrowid)
-
-            key = _identity_key(rt, logical_id, canonical_url, artifact_version, partition_key)
-            found = _find_curated(conn, key)
-            if found:
-                curated_id, current_sha = int(found[0]), found[1]
-                _upsert_variant(conn, curated_id, sha, run_id)
-                if current_sha != sha:
-                    conn.execute("UPDATE fhir_curated_resource SET has_conflict=1 WHERE curated_id=?", (curated_id,))
-                conn.execute(
-                    "UPDATE fhir_curated_resource SET last_seen_ts=(strftime('%Y-%m-%dT%H:%M:%fZ','now')) WHERE curated_id=?",
-                    (curated_id,),
-                )
-            else:
-                curated_id = _create_curated(conn, rt, logical_id, canonical_url, artifact_version, partition_key, sha)
-                conn.execute(
-                    "INSERT INTO fhir_curated_variant(curated_id, resource_sha256, occurrences, first_seen_run_id, last_seen_run_id) VALUES (?,?,?,?,?)",
-                    (curated_id, sha, 1, run_id, run_id),
-                )
-
-            conn.execute(
-                "INSERT OR REPLACE INTO fhir_raw_to_curated(raw_id, curated_id) VALUES (?,?)",
-                (raw_id, curated_id),
-            )
-
-            if extract_references:
-                for path, ref in ref_edges(obj):
-                    conn.execute(
-                        "INSERT INTO fhir_reference_edge(run_id, from_raw_id, from_path, to_reference) VALUES (?,?,?,?)",
-                        (run_id, raw_id, path, ref),
-                    )
-
-            raw_n += 1
-
-        conn.commit()
         _finish_run(conn, run_id)
-        return ImportResult(True, f"Imported FHIR package: run_id={run_id}, resources={raw_n}, files={len(files)}", run_id=run_id, raw_count=raw_n)
+        return ImportResult(True, f"Imported FHIR package: run_id={run_id}, resources={raw_n}, files={n_files}", run_id=run_id, raw_count=raw_n)
 
     except Exception as e:
         conn.rollback()
         return ImportResult(False, f"Package import failed: {e}", run_id=run_id, raw_count=0)
 
-    finally:
-        if _td is not None:
-            _td.cleanup()
 # --- XML support (Bundle import) ---------------------------------------------
 import xml.etree.ElementTree as ET
 
@@ -480,29 +910,77 @@ def _extract_resource_fields_from_xml(
     return rt, logical_id, canonical_url, artifact_version, meta_version_id, meta_last_updated
 
 
-def iter_xml_bundle_resources(xml_text: str) -> Iterable[tuple[Optional[str], ET.Element, str]]:
-    """
-    Yield (full_url, resource_element, resource_xml_text) for each Bundle.entry.resource.<X>.
-    """
-    root = ET.fromstring(xml_text)
+_ENTRY_TAG = f"{{{FHIR_NS}}}entry"
 
-    if _ln(root.tag) != "Bundle":
-        return
+# Characters of XML text handed to the pull parser per feed() call.
+_XML_FEED_CHARS = 1 << 16
 
-    # Bundle.entry is namespaced
-    for entry in root.findall(f".//{{{FHIR_NS}}}entry"):
-        full_url = _attr_value(_find_child(entry, "fullUrl"))
-        res_container = _find_child(entry, "resource")
-        if res_container is None:
-            continue
 
-        children = list(res_container)
-        if not children:
+def _xml_events(xml_text: str) -> Iterator[tuple[str, ET.Element]]:
+    # iterparse(io.StringIO(xml_text)) would first copy the whole document into
+    # StringIO's buffer (4 bytes per character); slices keep the extra memory at
+    # one chunk
+    parser = ET.XMLPullParser(events=("start", "end"))
+    for i in range(0, len(xml_text), _XML_FEED_CHARS):
+        parser.feed(xml_text[i:i + _XML_FEED_CHARS])
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+def _iter_xml_bundle(xml_text: str) -> Iterator[tuple[str, Any]]:
+    """Stream a FHIR XML Bundle in one parse pass.
+
+    Yields ``("type", value)`` for the (first) Bundle.type and
+    ``("resource", (full_url, resource_element, resource_xml_text))`` for each
+    Bundle.entry.resource.<X>, in document order. Each direct child of the Bundle
+    is dropped from the tree once handled, so memory stays at one entry rather
+    than the whole document. Non-Bundle documents are parsed but yield nothing.
+    """
+    root = None
+    is_bundle = False
+    seen_type = False
+    depth = 0
+    for event, elem in _xml_events(xml_text):
+        if event == "start":
+            if root is None:
+                root = elem
+                is_bundle = _ln(elem.tag) == "Bundle"
+            depth += 1
+            continue
+        depth -= 1
+        if depth != 1 or not is_bundle:
             continue
-        res_elem = children[0]
 
-        res_xml = ET.tostring(res_elem, encoding="unicode")
-        yield full_url, res_elem, res_xml
+        # a direct child of the Bundle is complete
+        if not seen_type and _ln(elem.tag) == "type":
+            seen_type = True
+            yield "type", _attr_value(elem)
+
+        # Bundle.entry is namespaced; iter() includes elem itself and any nested entries
+        for entry in elem.iter(_ENTRY_TAG):
+            full_url = _attr_value(_find_child(entry, "fullUrl"))
+            res_container = _find_child(entry, "resource")
+            if res_container is None:
+                continue
+
+            children = list(res_container)
+            if not children:
+                continue
+            res_elem = children[0]
+
+            res_xml = ET.tostring(res_elem, encoding="unicode")
+            yield "resource", (full_url, res_elem, res_xml)
+        del root[:]
+
+
+def iter_xml_bundle_resources(xml_text: str) -> Iterable[tuple[Optional[str], ET.Element, str]]:
+    """
+    Yield (full_url, resource_element, resource_xml_text) for each Bundle.entry.resource.<X>.
+    """
+    for kind, item in _iter_xml_bundle(xml_text):
+        if kind == "resource":
+            yield item
 
 
 def import_fhir_bundle_xml(
@@ -523,76 +1001,30 @@ def import_fhir_bundle_xml(
 
     run_id = _new_run(conn, source_name=source_name, source_kind="bundle", partition_key=partition_key)
     try:
-        # Best-effort bundle_type extraction
-        bundle_type = "collection"
-        try:
-            root = ET.fromstring(xml_text)
-            if _ln(root.tag) == "Bundle":
-                bt = _attr_value(_find_child(root, "type"))
-                if bt:
-                    bundle_type = bt
-        except Exception:
-            bundle_type = "collection"
-
         bsha = sha256_text(xml_text.strip())
-        cur = conn.execute(
-            "INSERT INTO fhir_raw_bundle(run_id, bundle_type, bundle_sha256, bundle_json) VALUES (?,?,?,?)",
-            (run_id, bundle_type, bsha, xml_text),
-        )
+        cur = conn.cursor()
+        # bundle_type is best-effort: "collection" unless the parse below finds Bundle.type
+        cur.execute(_SQL_INSERT_BUNDLE, (run_id, "collection", bsha, xml_text))
         bundle_id = int(cur.lastrowid)
 
-        raw_n = 0
+        batch = _RawBatch(cur, run_id, partition_key)
 
-        for full_url, res_elem, res_xml in iter_xml_bundle_resources(xml_text):
-            rt, logical_id, canonical_url, artifact_version, meta_version_id, meta_last_updated = _extract_resource_fields_from_xml(res_elem)
-            if not rt:
+        for kind, item in _iter_xml_bundle(xml_text):
+            if kind == "type":
+                if item:
+                    cur.execute(_SQL_SET_BUNDLE_TYPE, (item, bundle_id))
+                continue
+            full_url, res_elem, res_xml = item
+            fields = _extract_resource_fields_from_xml(res_elem)
+            if not fields[0]:
                 continue
 
             sha = sha256_text(res_xml.strip())
+            batch.add(bundle_id, full_url, fields, sha, res_xml)
 
-            cur = conn.execute(
-                """INSERT INTO fhir_raw_resource(
-                    run_id, bundle_id, full_url,
-                    resource_type, logical_id, canonical_url, artifact_version,
-                    meta_version_id, meta_last_updated,
-                    resource_sha256, resource_json
-                ) VALUES (?,?,?,?,?,?,?,?,?,?,?)""",
-                (
-                    run_id, bundle_id, full_url,
-                    rt, logical_id, canonical_url, artifact_version,
-                    meta_version_id, meta_last_updated,
-                    sha, res_xml,
-                ),
-            )
-            raw_id = int(cur.lastrowid)
-
-            key = _identity_key(rt, logical_id, canonical_url, artifact_version, partition_key)
-            found = _find_curated(conn, key)
-
-            if found:
-                curated_id, current_sha = int(found[0]), found[1]
-                _upsert_variant(conn, curated_id, sha, run_id)
-                if current_sha != sha:
-                    conn.execute("UPDATE fhir_curated_resource SET has_conflict=1 WHERE curated_id=?", (curated_id,))
-                conn.execute(
-                    "UPDATE fhir_curated_resource SET last_seen_ts=(strftime('%Y-%m-%dT%H:%M:%fZ','now')) WHERE curated_id=?",
-                    (curated_id,),
-                )
-            else:
-                curated_id = _create_curated(conn, rt, logical_id, canonical_url, artifact_version, partition_key, sha)
-                conn.execute(
-                    "INSERT INTO fhir_curated_variant(curated_id, resource_sha256, occurrences, first_seen_run_id, last_seen_run_id) VALUES (?,?,?,?,?)",
-                    (curated_id, sha, 1, run_id, run_id),
-                )
-
-            conn.execute(
-                "INSERT OR REPLACE INTO fhir_raw_to_curated(raw_id, curated_id) VALUES (?,?)",
-                (raw_id, curated_id),
-            )
-
-            raw_n += 1
+        batch.close()
+        raw_n = batch.count
 
-        conn.commit()
         _finish_run(conn, run_id)
         return ImportResult(True, f"Imported FHIR Bundle XML: run_id={run_id}, resources={raw_n}", run_id=run_id, raw_count=raw_n)
 
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-import json
 import sqlite3
 from dataclasses import dataclass
 from typing import Any, Optional
 
+from mdr_gtk.util import json_loads
+
 
 @dataclass
 class CuratedInfo:
@@ -16,7 +17,7 @@ class CuratedInfo:
     has_conflict: int
 
 
-def get_curated_by_ident(conn: sqlite3.Connection, ident: str) -> Optional[CuratedInfo]:
+def get_curated_by_ident(conn: sqlite3.Connection | sqlite3.Cursor, ident: str) -> Optional[CuratedInfo]:
     """Lookup curated resource by canonical_url or logical_id string (shown in GUI)."""
     row = conn.execute(
         "SELECT curated_id, resource_type, IFNULL(canonical_url, logical_id), IFNULL(artifact_version,''), current_sha256, has_conflict "
@@ -44,14 +45,16 @@ def get_variants_for_curated(conn: sqlite3.Connection, curated_id: int, limit: i
     return [(str(r[0]), int(r[1])) for r in rows]
 
 
-def get_raw_json_by_sha(conn: sqlite3.Connection, sha: str) -> Optional[dict[str, Any]]:
+def get_raw_json_by_sha(conn: sqlite3.Connection | sqlite3.Cursor, sha: str) -> Optional[dict[str, Any]]:
+    # as BLOB: UTF-8 bytes straight into the (orjson-backed) parser, no str decode
     row = conn.execute(
-        "SELECT resource_json FROM fhir_raw_resource WHERE resource_sha256=? ORDER BY first_seen_ts DESC LIMIT 1",
+        "SELECT CAST(resource_json AS BLOB) FROM fhir_raw_resource WHERE resource_sha256=? "
+        "ORDER BY first_seen_ts DESC LIMIT 1",
         (sha,),
     ).fetchone()
     if not row:
         return None
     try:
-        return json.loads(row[0])
+        return json_loads(row[0])
     except Exception:
         return None
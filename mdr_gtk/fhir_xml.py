@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import functools
 import json
+import re
 from dataclasses import dataclass
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
 import xml.etree.ElementTree as ET
 
@@ -86,31 +88,78 @@ STRICT_FIELD_ORDER: dict[str, list[str]] = {
 ],
 }
 
+# Per type: (field order, keys accepted in strict mode). Built once so the strict
+# path does one lookup per resource; the accepted set includes "resourceType".
+STRICT_FIELD_INDEX: dict[str, tuple[tuple[str, ...], frozenset[str]]] = {
+    rt: (tuple(order), frozenset(order) | {"resourceType"}) for rt, order in STRICT_FIELD_ORDER.items()
+}
 
 
 @dataclass
 class XmlBuildResult:
     ok: bool
     message: str
-    element: Optional[ET.Element] = None
+    # UTF-8 XML of the built element (no XML declaration); None on failure
+    xml_bytes: Optional[bytes] = None
+
+    @property
+    def element(self) -> Optional[ET.Element]:
+        """The result parsed into an Element (for callers that need a tree)."""
+        return None if self.xml_bytes is None else ET.fromstring(self.xml_bytes)
+
+
+# XML is written as text fragments into a list and encoded once, instead of
+# building an ElementTree just to serialize it. The output is byte-identical to
+# what ElementTree.write(encoding="utf-8") produced for the equivalent tree:
+# FHIR_NS is declared once on the root, children are unprefixed, childless
+# elements are written as ``<name ... />``.
+_XMLNS = f' xmlns="{FHIR_NS}"'
+_ATTR_SPECIAL = re.compile('[&<>"\r\n\t]')
 
 
-def _tag(name: str) -> str:
-    return f"{{{FHIR_NS}}}{name}"
+def _escape_attr(s: str) -> str:
+    # same replacements as ElementTree's attribute escaping
+    return (s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+            .replace("\r", "&#13;").replace("\n", "&#10;").replace("\t", "&#09;"))
+
+
+def _finish(out: list[str]) -> bytes:
+    # xmlcharrefreplace: lone surrogates become character references, as with ElementTree.write
+    return "".join(out).encode("utf-8", "xmlcharrefreplace")
 
 
 def _is_primitive(v: Any) -> bool:
     return isinstance(v, (str, int, float, bool))
 
 
-def _primitive_el(parent: ET.Element, name: str, value: Any) -> ET.Element:
-    el = ET.SubElement(parent, _tag(name))
-    # FHIR XML primitive values go into the "value" attribute
-    el.set("value", "true" if value is True else "false" if value is False else str(value))
-    return el
+def _open(out: list[str], name: str, xmlns: str = "") -> int:
+    out.append(f"<{name}{xmlns}>")
+    return len(out)
 
 
-def _serialize_generic(parent: ET.Element, key: str, value: Any) -> None:
+def _close(out: list[str], mark: int, name: str) -> None:
+    # ``mark`` is what _open returned: nothing written since means a childless element
+    if len(out) == mark:
+        out[mark - 1] = out[mark - 1][:-1] + " />"
+    else:
+        out.append(f"</{name}>")
+
+
+# keyed by type, not value: 1 == True and 0 == False would hit a plain value lookup
+_BOOL_TEXT = {True: "true", False: "false"}
+
+
+def _write_primitive(out: list[str], name: str, value: Any) -> None:
+    # FHIR XML primitive values go into the "value" attribute; strings (the common
+    # case) are used as they are
+    t = type(value)
+    s = value if t is str else _BOOL_TEXT[value] if t is bool else str(value)
+    if _ATTR_SPECIAL.search(s) is not None:
+        s = _escape_attr(s)
+    out.append(f'<{name} value="{s}" />')
+
+
+def _write_generic(out: list[str], name: str, value: Any, xmlns: str = "") -> None:
     # Generic FHIR-like XML serializer:
     # - primitives -> <key value="..."/>
     # - dict -> <key> ... </key>
@@ -119,106 +168,186 @@ def _serialize_generic(parent: ET.Element, key: str, value: Any) -> None:
         return
     if isinstance(value, list):
         for item in value:
-            _serialize_generic(parent, key, item)
+            _write_generic(out, name, item, xmlns)
         return
     if _is_primitive(value):
-        _primitive_el(parent, key, value)
+        _write_primitive(out, name, value)
         return
 
-    el = ET.SubElement(parent, _tag(key))
+    mark = _open(out, name, xmlns)
     if isinstance(value, dict):
         for k, v in value.items():
             if k == "resourceType":
                 continue
-            _serialize_generic(el, k, v)
+            if type(v) is str:
+                # most leaves are strings: written here, without the dispatch above
+                if _ATTR_SPECIAL.search(v) is not None:
+                    v = _escape_attr(v)
+                out.append(f'<{k} value="{v}" />')
+            else:
+                _write_generic(out, k, v)
+        _close(out, mark, name)
     else:
-        # fallback: stringify
-        _primitive_el(parent, key, json.dumps(value, ensure_ascii=False))
+        # fallback: stringify (next to an empty element, as before)
+        _close(out, mark, name)
+        _write_primitive(out, name, json.dumps(value, ensure_ascii=False))
+
+
+def _write_resource_generic(out: list[str], rt: str, resource: dict[str, Any], xmlns: str) -> None:
+    mark = _open(out, rt, xmlns)
+    for k, v in resource.items():
+        if k == "resourceType":
+            continue
+        _write_generic(out, k, v)
+    _close(out, mark, rt)
 
 
-def _unknown_fields(resource: dict[str, Any], allowed: set[str]) -> set[str]:
-    return {k for k in resource.keys() if k not in allowed and k != "resourceType"}
+def _unknown_fields(resource: dict[str, Any], allowed: frozenset[str]) -> set[str]:
+    return resource.keys() - allowed
 
 
-def resource_to_xml_element(resource: dict[str, Any], *, mode: str = "best-effort") -> XmlBuildResult:
-    """Convert a single FHIR JSON resource dict into an XML Element.
+def _write_entry(out: list[str], entry: dict[str, Any], mode: str, xmlns: str) -> tuple[bool, str]:
+    if mode == "best-effort":
+        _write_generic(out, "entry", entry, xmlns)
+        return True, "OK"
 
-    mode:
-      - "best-effort": serialize any resource generically (FHIR-like), no strict validation.
-      - "strict": only supports Bundle/Patient/Observation and rejects unknown fields for those types.
+    mark = _open(out, "entry", xmlns)
+    # Bundle.entry fields ordering subset
+    if "fullUrl" in entry:
+        _write_primitive(out, "fullUrl", entry["fullUrl"])
+    resource = entry.get("resource")
+    if isinstance(resource, dict):
+        rt = resource.get("resourceType")
+        if not isinstance(rt, str) or not rt:
+            return False, "Missing resourceType"
+        res_mark = _open(out, "resource")
+        ok, message = _strict_writer_for(rt, mode)(out, resource, "")
+        if not ok:
+            return ok, message
+        _close(out, res_mark, "resource")
+    _close(out, mark, "entry")
+    return True, "OK"
+
+
+# (out, resource, xmlns) -> (ok, message); see _strict_writer_for
+_ResourceWriter = Callable[[list[str], dict[str, Any], str], tuple[bool, str]]
+
+
+@functools.lru_cache(maxsize=256)
+def _strict_writer_for(rt: str, mode: str) -> _ResourceWriter:
+    """Writer for resources of type ``rt`` in "strict" or "strictish" mode.
+
+    Whether the type is supported, its field order and its accepted keys are
+    resolved once per (type, mode), so a Bundle whose entries share a few types
+    only pays for the unknown-field check and the writing itself per entry.
     """
-    rt = resource.get("resourceType")
-    if not isinstance(rt, str) or not rt:
-        return XmlBuildResult(False, "Missing resourceType")
+    strictish = mode == "strictish"
 
-    if mode not in ("best-effort", "strict", "strictish"):
-        return XmlBuildResult(False, f"Invalid mode: {mode}")
+    def fallback(message: str) -> _ResourceWriter:
+        def write(out: list[str], resource: dict[str, Any], xmlns: str) -> tuple[bool, str]:
+            _write_resource_generic(out, rt, resource, xmlns)
+            return True, message
+        return write
 
-    if mode in ("strict", "strictish"):
-        if rt not in SUPPORTED_STRICT_TYPES:
-            if mode == "strictish":
-                # fallback to best-effort for unsupported types
-                root = ET.Element(_tag(rt))
-                for k, v in resource.items():
-                    if k == "resourceType":
-                        continue
-                    _serialize_generic(root, k, v)
-                return XmlBuildResult(True, f"OK (strictish fallback for {rt})", element=root)
-            return XmlBuildResult(False, f"Strict XML supports only: {sorted(SUPPORTED_STRICT_TYPES)} (got {rt})")
-        order = STRICT_FIELD_ORDER.get(rt)
-        if order is None:
-            # SUPPORTED_STRICT_TYPES and STRICT_FIELD_ORDER can drift. In strictish mode we must never crash;
-            # fall back to generic (best-effort) XML when strict metadata for this type is missing.
-            if mode == "strictish":
-                root = ET.Element(_tag(rt))
-                for k, v in resource.items():
-                    if k == "resourceType":
-                        continue
-                    _serialize_generic(root, k, v)
-                return XmlBuildResult(True, f"OK (strictish fallback missing field order for {rt})", element=root)
-            return XmlBuildResult(False, f"Strict XML missing field order for {rt}")
-        allowed = set(order)
+    def reject(message: str) -> _ResourceWriter:
+        def write(out: list[str], resource: dict[str, Any], xmlns: str) -> tuple[bool, str]:
+            return False, message
+        return write
+
+    if rt not in SUPPORTED_STRICT_TYPES:
+        if strictish:
+            # fallback to best-effort for unsupported types
+            return fallback(f"OK (strictish fallback for {rt})")
+        return reject(f"Strict XML supports only: {sorted(SUPPORTED_STRICT_TYPES)} (got {rt})")
+    strict = STRICT_FIELD_INDEX.get(rt)
+    if strict is None:
+        # SUPPORTED_STRICT_TYPES and STRICT_FIELD_ORDER can drift. In strictish mode we must never crash;
+        # fall back to generic (best-effort) XML when strict metadata for this type is missing.
+        if strictish:
+            return fallback(f"OK (strictish fallback missing field order for {rt})")
+        return reject(f"Strict XML missing field order for {rt}")
+    order, allowed = strict
+    is_bundle = rt == "Bundle"
+
+    def write(out: list[str], resource: dict[str, Any], xmlns: str) -> tuple[bool, str]:
         unknown = _unknown_fields(resource, allowed)
         if unknown:
-            if mode == "strictish":
-                root = ET.Element(_tag(rt))
-                for k, v in resource.items():
-                    if k == "resourceType":
-                        continue
-                    _serialize_generic(root, k, v)
-                return XmlBuildResult(True, f"OK (strictish fallback unknown fields for {rt})", element=root)
-            return XmlBuildResult(False, f"Strict XML: unknown fields for {rt}: {sorted(unknown)}")
-
-        root = ET.Element(_tag(rt))
+            if strictish:
+                _write_resource_generic(out, rt, resource, xmlns)
+                return True, f"OK (strictish fallback unknown fields for {rt})"
+            return False, f"Strict XML: unknown fields for {rt}: {sorted(unknown)}"
+
+        mark = _open(out, rt, xmlns)
         for k in order:
             if k not in resource:
                 continue
-            v = resource.get(k)
-            if k == "entry" and rt == "Bundle":
+            v = resource[k]
+            if is_bundle and k == "entry":
                 # entry is a list of dicts, each -> <entry>...
                 if isinstance(v, list):
                     for entry in v:
                         if not isinstance(entry, dict):
                             continue
-                        entry_el = ET.SubElement(root, _tag("entry"))
-                        # Bundle.entry fields ordering subset
-                        if "fullUrl" in entry:
-                            _primitive_el(entry_el, "fullUrl", entry["fullUrl"])
-                        if "resource" in entry and isinstance(entry["resource"], dict):
-                            res_wrap = ET.SubElement(entry_el, _tag("resource"))
-                            child = resource_to_xml_element(entry["resource"], mode=mode)
-                            if not child.ok or child.element is None:
-                                return child
-                            res_wrap.append(child.element)
+                        ok, message = _write_entry(out, entry, mode, "")
+                        if not ok:
+                            return ok, message
                 continue
+            if type(v) is str:
+                # as in _write_generic's dict loop
+                if _ATTR_SPECIAL.search(v) is not None:
+                    v = _escape_attr(v)
+                out.append(f'<{k} value="{v}" />')
+            else:
+                _write_generic(out, k, v)
+        _close(out, mark, rt)
+        return True, "OK"
+
+    return write
 
-            _serialize_generic(root, k, v)
-        return XmlBuildResult(True, "OK", element=root)
+
+def _write_resource(out: list[str], resource: dict[str, Any], mode: str, xmlns: str) -> tuple[bool, str]:
+    rt = resource.get("resourceType")
+    if not isinstance(rt, str) or not rt:
+        return False, "Missing resourceType"
+
+    if mode not in ("best-effort", "strict", "strictish"):
+        return False, f"Invalid mode: {mode}"
+
+    if mode in ("strict", "strictish"):
+        return _strict_writer_for(rt, mode)(out, resource, xmlns)
 
     # best-effort
-    root = ET.Element(_tag(rt))
-    for k, v in resource.items():
-        if k == "resourceType":
-            continue
-        _serialize_generic(root, k, v)
-    return XmlBuildResult(True, "OK", element=root)
+    _write_resource_generic(out, rt, resource, xmlns)
+    return True, "OK"
+
+
+def bundle_entry_to_xml_element(entry: dict[str, Any], *, mode: str = "best-effort",
+                                declare_ns: bool = True) -> XmlBuildResult:
+    """Convert one Bundle.entry dict into ``<entry>`` XML.
+
+    Produces exactly what :func:`resource_to_xml_element` emits for that entry
+    inside a Bundle, so callers can serialize a Bundle entry by entry (streaming).
+    Pass ``declare_ns=False`` when the entry goes inside an element that already
+    declares the FHIR namespace.
+    """
+    if mode not in ("best-effort", "strict", "strictish"):
+        return XmlBuildResult(False, f"Invalid mode: {mode}")
+    out: list[str] = []
+    ok, message = _write_entry(out, entry, mode, _XMLNS if declare_ns else "")
+    if not ok:
+        return XmlBuildResult(False, message)
+    return XmlBuildResult(True, message, xml_bytes=_finish(out))
+
+
+def resource_to_xml_element(resource: dict[str, Any], *, mode: str = "best-effort") -> XmlBuildResult:
+    """Convert a single FHIR JSON resource dict into XML.
+
+    mode:
+      - "best-effort": serialize any resource generically (FHIR-like), no strict validation.
+      - "strict": only supports Bundle/Patient/Observation and rejects unknown fields for those types.
+    """
+    out: list[str] = []
+    ok, message = _write_resource(out, resource, mode, _XMLNS)
+    if not ok:
+        return XmlBuildResult(False, message)
+    return XmlBuildResult(True, message, xml_bytes=_finish(out))
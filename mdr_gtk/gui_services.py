@@ -1,13 +1,13 @@
 from __future__ import annotations
 
-import json
 import sqlite3
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Iterable, Sequence
 
+from mdr_gtk.db import has_curated_fts
 from mdr_gtk.services import ensure_schema_applied
-from mdr_gtk.fhir_ingest import import_fhir_bundle_json, import_fhir_package
+from mdr_gtk.fhir_ingest import import_fhir_bundle_json_text, import_fhir_package
 from mdr_gtk.fhir_selected_export import export_selected_bundle_json, export_selected_bundle_xml
 from mdr_gtk.fhir_filter import CuratedFilter, build_curated_query
 
@@ -27,16 +27,23 @@ class GUIServiceFacade:
     """
 
     conn: sqlite3.Connection
+    # set once the schema check passed: every action calls ensure_schema(), and the
+    # sqlite_master probe only needs to run once per connection
+    _schema_ok: bool = field(default=False, init=False, repr=False, compare=False)
 
     def ensure_schema(self) -> None:
+        if self._schema_ok:
+            return
         ensure_schema_applied(self.conn)
+        self._schema_ok = True
 
     # -------- FHIR imports --------
     def import_fhir_bundle_json_file(self, path: str, *, source_name: str | None = None):
         self.ensure_schema()
         p = Path(path)
-        obj = json.loads(p.read_text(encoding="utf-8"))
-        return import_fhir_bundle_json(self.conn, obj, source_name=source_name or f"file:{p.name}")
+        # parsed entry by entry: the whole Bundle is never in memory as a dict tree
+        raw = p.read_text(encoding="utf-8")
+        return import_fhir_bundle_json_text(self.conn, raw, source_name=source_name or f"file:{p.name}")
 
     def import_fhir_package_file(self, path: str, *, source_name: str | None = None, partition_key: str | None = None):
         self.ensure_schema()
@@ -63,7 +70,7 @@ class GUIServiceFacade:
         Optionally restrict by :class:`~mdr_gtk.fhir_filter.CuratedFilter`.
         """
         self.ensure_schema()
-        sql, params = build_curated_query(curated_filter)
+        sql, params = build_curated_query(curated_filter, use_fts=has_curated_fts(self.conn))
         curated_idents = [r[0] for r in self.conn.execute(sql, params).fetchall()]
         return export_selected_bundle_json(self.conn, curated_idents, out_path)
 
@@ -73,6 +80,6 @@ class GUIServiceFacade:
         Optionally restrict by :class:`~mdr_gtk.fhir_filter.CuratedFilter`.
         """
         self.ensure_schema()
-        sql, params = build_curated_query(curated_filter)
+        sql, params = build_curated_query(curated_filter, use_fts=has_curated_fts(self.conn))
         curated_idents = [r[0] for r in self.conn.execute(sql, params).fetchall()]
         return export_selected_bundle_xml(self.conn, curated_idents, out_path)
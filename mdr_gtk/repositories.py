@@ -1,95 +1,222 @@
 from __future__ import annotations
 
+import functools
+import os
 import sqlite3
-import uuid as uuidlib
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from mdr_gtk.db import has_item_fts
 from mdr_gtk.models import RegistrableItem
 
 
 def new_uuid(prefix: str) -> str:
-    return f"{prefix}-{uuidlib.uuid4().hex[:12]}"
+    # 48 random bits, as the first 12 hex digits of a uuid4 were, without the UUID object
+    return f"{prefix}-{os.urandom(6).hex()}"
+
+
+# Statements shared by the single-row and bulk (executemany) Repo methods. Like the
+# single-row methods, the bulk ones leave committing to the caller; all their rows
+# go into one implicit transaction, so a bulk call costs one journal sync.
+_SQL_INSERT_ITEM = """
+INSERT INTO registrable_item(
+  uuid,item_type,preferred_name,definition,context_uuid,registration_authority_uuid,
+  registration_status,administrative_status,steward,submitting_organization,version
+)
+VALUES(?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+_SQL_UPSERT_DESIGNATION = """
+INSERT INTO designation(uuid,item_uuid,context_uuid,language_tag,designation_type,designation,is_preferred)
+VALUES(?,?,?,?,?,?,?)
+ON CONFLICT(uuid) DO UPDATE SET
+  context_uuid=excluded.context_uuid,
+  language_tag=excluded.language_tag,
+  designation_type=excluded.designation_type,
+  designation=excluded.designation,
+  is_preferred=excluded.is_preferred
+"""
+
+_SQL_UPSERT_PERMISSIBLE_VALUE = """
+INSERT INTO permissible_value(uuid,value_domain_uuid,code,meaning,sort_order)
+VALUES(?,?,?,?,?)
+ON CONFLICT(uuid) DO UPDATE SET
+  value_domain_uuid=excluded.value_domain_uuid,
+  code=excluded.code,
+  meaning=excluded.meaning,
+  sort_order=excluded.sort_order
+"""
+
+_SQL_ADD_ITEM_CLASSIFICATION = """
+INSERT OR IGNORE INTO item_classification(uuid,item_uuid,classification_item_uuid,assigned_by)
+VALUES(?,?,?,?)
+"""
+
+
+@functools.lru_cache(maxsize=128)
+def _update_item_sql(cols: Tuple[str, ...]) -> str:
+    # update_item's SET clause depends on which fields change; the UI only ever
+    # sends a handful of field sets, so each text is built once
+    sets = "".join(f"{k}=?, " for k in cols)
+    return "UPDATE registrable_item SET " + sets + "version=version+1 WHERE uuid=?"
+
+
+# History row for the version update_item just replaced.
+_SQL_INSERT_ITEM_VERSION = """
+INSERT INTO item_version(uuid,item_uuid,version,changed_by,change_note)
+SELECT ?, uuid, version - 1, ?, ? FROM registrable_item WHERE uuid=?
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def _ensure_row_sql(table: str) -> str:
+    return f"INSERT OR IGNORE INTO {table}(uuid) VALUES(?)"
+
+
+_SQL_LIST_ITEMS_BASE = (
+    "SELECT uuid, preferred_name, definition, registration_status, administrative_status, version, updated_at "
+    "FROM registrable_item WHERE item_type=? "
+)
+# served by ix_ri_type_name_nocase, no sort step
+_SQL_LIST_ITEMS_ORDER = "ORDER BY preferred_name COLLATE NOCASE"
+
+# Search driven from the FTS hits (CROSS JOIN pins the loop order): the planner
+# otherwise walks every item of the type in name order and probes the hit list
+# per row. Sorting the few hits is far cheaper than that scan.
+_SQL_LIST_ITEMS_FTS = (
+    "SELECT ri.uuid, ri.preferred_name, ri.definition, ri.registration_status, "
+    "ri.administrative_status, ri.version, ri.updated_at "
+    "FROM registrable_item_fts f "
+    "CROSS JOIN registrable_item_fts_key k ON k.fts_rowid = f.rowid "
+    "CROSS JOIN registrable_item ri ON ri.uuid = k.uuid "
+    "WHERE f.registrable_item_fts MATCH ? AND ri.item_type=? "
+    "ORDER BY ri.preferred_name COLLATE NOCASE"
+)
+
+# The trigram tokenizer cannot match needles shorter than one trigram.
+_FTS_MIN_LEN = 3
+
+
+def _item_params(item: RegistrableItem) -> tuple:
+    return (
+        item.uuid, item.item_type, item.preferred_name, item.definition,
+        item.context_uuid, item.registration_authority_uuid,
+        item.registration_status, item.administrative_status,
+        item.steward, item.submitting_organization, item.version,
+    )
 
 
 class Repo:
     def __init__(self, conn: sqlite3.Connection):
         self.conn = conn
+        # fetch_refs results per item_type; dropped by the item write methods below
+        self._refs_cache: Dict[str, List[Tuple[str, str]]] = {}
+        # registrable_item_fts is created once and never dropped, so only a
+        # missing index needs re-checking (it may be added by ensure_indexes later)
+        self._item_fts = False
+
+    def invalidate_refs(self, item_type: str | None = None) -> None:
+        """Forget cached :meth:`fetch_refs` results for one type, or all of them.
+
+        The Repo write methods do this themselves; call it after writing
+        registrable_item rows through the connection directly.
+        """
+        if item_type is None:
+            self._refs_cache.clear()
+        else:
+            self._refs_cache.pop(item_type, None)
 
     # ---------- shared: registrable_item ----------
     def create_item(self, item: RegistrableItem) -> None:
-        self.conn.execute(
-            """
-            INSERT INTO registrable_item(
-              uuid,item_type,preferred_name,definition,context_uuid,registration_authority_uuid,
-              registration_status,administrative_status,steward,submitting_organization,version
-            )
-            VALUES(?,?,?,?,?,?,?,?,?,?,?)
-            """,
-            (
-                item.uuid, item.item_type, item.preferred_name, item.definition,
-                item.context_uuid, item.registration_authority_uuid,
-                item.registration_status, item.administrative_status,
-                item.steward, item.submitting_organization, item.version,
-            ),
-        )
+        self.conn.execute(_SQL_INSERT_ITEM, _item_params(item))
+        self._refs_cache.pop(item.item_type, None)
+
+    def create_items(self, items: Iterable[RegistrableItem]) -> None:
+        """Bulk :meth:`create_item`: one executemany, one implicit transaction."""
+        self.conn.executemany(_SQL_INSERT_ITEM, (_item_params(item) for item in items))
+        self._refs_cache.clear()
 
     def update_item(self, item_uuid: str, fields: Dict[str, Any], change_note: str | None = None, changed_by: str | None = None) -> None:
-        cur = self.conn.execute("SELECT version FROM registrable_item WHERE uuid=?", (item_uuid,))
-        row = cur.fetchone()
-        if not row:
+        # bump the version in the UPDATE itself instead of reading it first; the
+        # history row is derived from the updated row inside the same transaction
+        fields = {k: v for k, v in fields.items() if k != "version"}
+        cur = self.conn.execute(_update_item_sql(tuple(fields)), [*fields.values(), item_uuid])
+        if cur.rowcount == 0:
             raise ValueError("Item not found")
-        old_version = int(row["version"])
-
-        self.conn.execute(
-            "INSERT INTO item_version(uuid,item_uuid,version,changed_by,change_note) VALUES(?,?,?,?,?)",
-            (new_uuid("iv"), item_uuid, old_version, changed_by, change_note),
-        )
-
-        new_version = old_version + 1
-        fields = dict(fields)
-        fields["version"] = new_version
-
-        cols = ", ".join([f"{k}=?" for k in fields.keys()])
-        params = list(fields.values()) + [item_uuid]
-        self.conn.execute(f"UPDATE registrable_item SET {cols} WHERE uuid=?", params)
+        self.conn.execute(_SQL_INSERT_ITEM_VERSION, (new_uuid("iv"), changed_by, change_note, item_uuid))
+        # only the uuid is known here, not the item's type
+        self._refs_cache.clear()
 
     def delete_item(self, item_uuid: str) -> None:
         self.conn.execute("DELETE FROM registrable_item WHERE uuid=?", (item_uuid,))
+        self._refs_cache.clear()
 
     def list_items(self, item_type: str, q: str | None = None) -> List[sqlite3.Row]:
+        """Items of one type ordered by name; ``q`` is a case-insensitive substring
+        of preferred_name or definition.
+
+        ``q`` is answered from the registrable_item_fts trigram index when the
+        database has one (see :func:`mdr_gtk.db.ensure_item_fts`); needles shorter
+        than one trigram, and databases without FTS5, use a LIKE scan.
+        """
+        if q and len(q) >= _FTS_MIN_LEN and self._has_item_fts():
+            return list(self.conn.execute(
+                _SQL_LIST_ITEMS_FTS, ('"' + q.replace('"', '""') + '"', item_type),
+            ))
         if q:
             return list(self.conn.execute(
-                """
-                SELECT uuid, preferred_name, definition, registration_status, administrative_status, version, updated_at
-                FROM registrable_item
-                WHERE item_type=? AND (preferred_name LIKE ? OR definition LIKE ?)
-                ORDER BY preferred_name COLLATE NOCASE
-                """,
+                _SQL_LIST_ITEMS_BASE + "AND (preferred_name LIKE ? OR definition LIKE ?) " + _SQL_LIST_ITEMS_ORDER,
                 (item_type, f"%{q}%", f"%{q}%"),
             ))
-        return list(self.conn.execute(
-            """
-            SELECT uuid, preferred_name, definition, registration_status, administrative_status, version, updated_at
-            FROM registrable_item
-            WHERE item_type=?
-            ORDER BY preferred_name COLLATE NOCASE
-            """,
-            (item_type,),
-        ))
+        return list(self.conn.execute(_SQL_LIST_ITEMS_BASE + _SQL_LIST_ITEMS_ORDER, (item_type,)))
+
+    def _has_item_fts(self) -> bool:
+        if not self._item_fts:
+            self._item_fts = has_item_fts(self.conn)
+        return self._item_fts
 
     def get_item(self, item_uuid: str) -> Optional[sqlite3.Row]:
         return self.conn.execute("SELECT * FROM registrable_item WHERE uuid=?", (item_uuid,)).fetchone()
 
     def fetch_refs(self, item_type: str) -> List[Tuple[str, str]]:
-        rows = self.conn.execute(
+        """(uuid, preferred_name) of all items of one type, ordered by name.
+
+        Cached per type until the next item write through this Repo; the returned
+        list is shared with the cache and must not be modified.
+        """
+        refs = self._refs_cache.get(item_type)
+        if refs is not None:
+            return refs
+        # plain tuples straight from the cursor: no sqlite3.Row per row, no re-packing
+        cur = self.conn.cursor()
+        cur.row_factory = None
+        cur.execute(
             "SELECT uuid, preferred_name FROM registrable_item WHERE item_type=? ORDER BY preferred_name COLLATE NOCASE",
             (item_type,),
-        ).fetchall()
-        return [(r["uuid"], r["preferred_name"]) for r in rows]
+        )
+        refs = self._refs_cache[item_type] = cur.fetchall()
+        return refs
+
+    def fetch_refs_many(self, item_types: Iterable[str]) -> Dict[str, List[Tuple[str, str]]]:
+        """:meth:`fetch_refs` for several types; uncached ones come from one query."""
+        item_types = list(dict.fromkeys(item_types))
+        missing = [t for t in item_types if t not in self._refs_cache]
+        if missing:
+            fetched: Dict[str, List[Tuple[str, str]]] = {t: [] for t in missing}
+            cur = self.conn.cursor()
+            cur.row_factory = None
+            cur.execute(
+                "SELECT item_type, uuid, preferred_name FROM registrable_item "
+                f"WHERE item_type IN ({','.join('?' * len(missing))}) ORDER BY preferred_name COLLATE NOCASE",
+                missing,
+            )
+            for item_type, item_uuid, name in cur:
+                fetched[item_type].append((item_uuid, name))
+            self._refs_cache.update(fetched)
+        return {t: self._refs_cache[t] for t in item_types}
 
     # ---------- ensure entity rows (1:1 tables) ----------
     def ensure_row(self, table: str, uuid: str) -> None:
-        self.conn.execute(f"INSERT OR IGNORE INTO {table}(uuid) VALUES(?)", (uuid,))
+        self.conn.execute(_ensure_row_sql(table), (uuid,))
 
     # ---------- VD / DEC / DE ----------
     def upsert_value_domain(self, uuid: str, datatype: str, unit_of_measure: str | None, max_length: int | None,
@@ -158,19 +285,14 @@ class Repo:
     def upsert_designation(self, des_uuid: str, item_uuid: str, context_uuid: str | None, language_tag: str,
                           designation_type: str, designation: str, is_preferred: int) -> None:
         self.conn.execute(
-            """
-            INSERT INTO designation(uuid,item_uuid,context_uuid,language_tag,designation_type,designation,is_preferred)
-            VALUES(?,?,?,?,?,?,?)
-            ON CONFLICT(uuid) DO UPDATE SET
-              context_uuid=excluded.context_uuid,
-              language_tag=excluded.language_tag,
-              designation_type=excluded.designation_type,
-              designation=excluded.designation,
-              is_preferred=excluded.is_preferred
-            """,
+            _SQL_UPSERT_DESIGNATION,
             (des_uuid, item_uuid, context_uuid, language_tag, designation_type, designation, int(is_preferred)),
         )
 
+    def upsert_designations(self, rows: Iterable[Tuple[str, str, str | None, str, str, str, int]]) -> None:
+        """Bulk :meth:`upsert_designation`; rows are its arguments as tuples, in order."""
+        self.conn.executemany(_SQL_UPSERT_DESIGNATION, ((*r[:6], int(r[6])) for r in rows))
+
     def delete_designation(self, des_uuid: str) -> None:
         self.conn.execute("DELETE FROM designation WHERE uuid=?", (des_uuid,))
 
@@ -187,18 +309,11 @@ class Repo:
         ))
 
     def upsert_permissible_value(self, pv_uuid: str, vd_uuid: str, code: str, meaning: str, sort_order: int | None) -> None:
-        self.conn.execute(
-            """
-            INSERT INTO permissible_value(uuid,value_domain_uuid,code,meaning,sort_order)
-            VALUES(?,?,?,?,?)
-            ON CONFLICT(uuid) DO UPDATE SET
-              value_domain_uuid=excluded.value_domain_uuid,
-              code=excluded.code,
-              meaning=excluded.meaning,
-              sort_order=excluded.sort_order
-            """,
-            (pv_uuid, vd_uuid, code, meaning, sort_order),
-        )
+        self.conn.execute(_SQL_UPSERT_PERMISSIBLE_VALUE, (pv_uuid, vd_uuid, code, meaning, sort_order))
+
+    def upsert_permissible_values(self, rows: Iterable[Tuple[str, str, str, str, int | None]]) -> None:
+        """Bulk :meth:`upsert_permissible_value`; rows are its arguments as tuples, in order."""
+        self.conn.executemany(_SQL_UPSERT_PERMISSIBLE_VALUE, rows)
 
     def delete_permissible_value(self, pv_uuid: str) -> None:
         self.conn.execute("DELETE FROM permissible_value WHERE uuid=?", (pv_uuid,))
@@ -253,12 +368,17 @@ class Repo:
 
     def add_item_classification(self, item_uuid: str, classification_item_uuid: str, assigned_by: str | None) -> None:
         self.conn.execute(
-            """
-            INSERT OR IGNORE INTO item_classification(uuid,item_uuid,classification_item_uuid,assigned_by)
-            VALUES(?,?,?,?)
-            """,
+            _SQL_ADD_ITEM_CLASSIFICATION,
             (new_uuid("ic"), item_uuid, classification_item_uuid, assigned_by),
         )
 
+    def add_item_classifications(self, item_uuid: str, classification_item_uuids: Iterable[str],
+                                 assigned_by: str | None) -> None:
+        """Bulk :meth:`add_item_classification` for one item."""
+        self.conn.executemany(
+            _SQL_ADD_ITEM_CLASSIFICATION,
+            ((new_uuid("ic"), item_uuid, ci_uuid, assigned_by) for ci_uuid in classification_item_uuids),
+        )
+
     def delete_item_classification(self, ic_uuid: str) -> None:
         self.conn.execute("DELETE FROM item_classification WHERE uuid=?", (ic_uuid,))
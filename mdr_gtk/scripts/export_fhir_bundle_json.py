@@ -7,7 +7,6 @@ from pathlib import Path
 
 from mdr_gtk.db import connect
 from mdr_gtk.util import read_text
-from mdr_gtk.fhir_export import export_curated_bundle_json
 
 
 def ensure_schema_applied(conn) -> None:
@@ -24,15 +23,19 @@ def main() -> None:
     p.add_argument("--db", required=True, help="SQLite DB path")
     p.add_argument("--out", default=None, help="Output file path")
     p.add_argument("--limit", type=int, default=500, help="Max curated resources")
+    p.add_argument("--pretty", action="store_true", help="Indent the output (slower; default is compact)")
     args = p.parse_args()
 
+    # the export stack is imported only once the arguments are valid (fast --help)
+    from mdr_gtk.fhir_export import export_curated_bundle_json
+
     out = args.out
     if out is None:
         out = str(Path(args.db).with_suffix(".export.bundle.json"))
     conn = connect(args.db)
     ensure_schema_applied(conn)
     try:
-        res = export_curated_bundle_json(conn, out, limit=args.limit)
+        res = export_curated_bundle_json(conn, out, limit=args.limit, pretty=args.pretty)
     finally:
         conn.close()
 
@@ -7,7 +7,6 @@ from pathlib import Path
 
 from mdr_gtk.db import connect
 from mdr_gtk.util import read_text
-from mdr_gtk.fhir_export import export_curated_bundle_xml
 
 
 def ensure_schema_applied(conn) -> None:
@@ -27,6 +26,9 @@ def main() -> None:
     p.add_argument("--mode", default="best-effort", choices=["best-effort","strict","strictish"], help="XML serialization mode")
     args = p.parse_args()
 
+    # the export stack is imported only once the arguments are valid (fast --help)
+    from mdr_gtk.fhir_export import export_curated_bundle_xml
+
     out = args.out
     if out is None:
         out = str(Path(args.db).with_suffix(".export.bundle.xml"))
@@ -4,15 +4,56 @@ Export MDR content to a single JSON file.
 from __future__ import annotations
 
 import argparse
-import json
 from pathlib import Path
 import sqlite3
 
 from mdr_gtk.db import connect
+from mdr_gtk.util import json_dumps_bytes
 
 
-def rows_to_dicts(rows):
-    return [dict(r) for r in rows]
+TABLES = [
+    "context",
+    "registration_authority",
+    "registrable_item",
+    "conceptual_domain",
+    "representation_class",
+    "object_class",
+    "property",
+    "data_element_concept",
+    "value_domain",
+    "data_element",
+    "designation",
+    "permissible_value",
+    "classification_scheme",
+    "classification_item",
+    "item_classification",
+    "item_version",
+]
+
+
+def write_table(f, conn: sqlite3.Connection, table: str, *, first: bool) -> None:
+    """Append ``"table": [rows...]`` to the export, one row at a time.
+
+    The layout is exactly what ``json.dumps(data, indent=2)`` gives for the
+    whole ``{table: [row dicts]}`` mapping, so the file is the same as when all
+    tables were loaded into one dict first, without holding them in memory.
+    """
+    cur = conn.cursor()
+    cur.row_factory = None
+    cur.execute(f"SELECT * FROM {table}")
+    cols = [d[0] for d in cur.description]
+    f.write(b"{\n" if first else b",\n")
+    f.write(b'  "' + table.encode() + b'": [')
+    sep = b"\n    "
+    while True:
+        batch = cur.fetchmany(512)
+        if not batch:
+            break
+        for row in batch:
+            # row values are scalars, so the only newlines are the dict's own
+            f.write(sep + json_dumps_bytes(dict(zip(cols, row)), indent=True).replace(b"\n", b"\n    "))
+            sep = b",\n    "
+    f.write(b"]" if sep == b"\n    " else b"\n  ]")
 
 
 def main() -> None:
@@ -23,32 +64,13 @@ def main() -> None:
 
     conn = connect(args.db)
     try:
-        data: dict[str, object] = {}
-        # Core tables
-        for table in [
-            "context",
-            "registration_authority",
-            "registrable_item",
-            "conceptual_domain",
-            "representation_class",
-            "object_class",
-            "property",
-            "data_element_concept",
-            "value_domain",
-            "data_element",
-            "designation",
-            "permissible_value",
-            "classification_scheme",
-            "classification_item",
-            "item_classification",
-            "item_version",
-        ]:
-            rows = conn.execute(f"SELECT * FROM {table}").fetchall()
-            data[table] = rows_to_dicts(rows)
-
         out = Path(args.out)
         out.parent.mkdir(parents=True, exist_ok=True)
-        out.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        # tables are streamed to the file row by row instead of being collected first
+        with out.open("wb") as f:
+            for i, table in enumerate(TABLES):
+                write_table(f, conn, table, first=i == 0)
+            f.write(b"\n}")
         print(f"OK: Exported {out.resolve()}")
     finally:
         conn.close()
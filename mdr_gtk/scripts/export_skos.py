@@ -34,110 +34,102 @@ def main() -> None:
     conn = connect(args.db)
     try:
         base = args.base
-
-        out_lines = []
-        out_lines.append("@prefix skos: <http://www.w3.org/2004/02/skos/core#> .")
-        out_lines.append("@prefix dcterms: <http://purl.org/dc/terms/> .")
-        out_lines.append("@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .")
-        out_lines.append("")
-
-        # Generic scheme for all items
-        scheme_items = "urn:mdr:items"
-        out_lines.append(f"<{scheme_items}> a skos:ConceptScheme ; skos:prefLabel \"MDR Items\"@en .")
-        out_lines.append("")
-
-        # Classification schemes
-        schemes = conn.execute(
-            """
-            SELECT ri.uuid, ri.preferred_name, ri.definition, cs.scheme_uri
-            FROM classification_scheme cs
-            JOIN registrable_item ri ON ri.uuid = cs.uuid
-            """
-        ).fetchall()
-
-        for s in schemes:
-            s_iri = iri(base, s["uuid"])
-            label = ttl_escape(s["preferred_name"])
-            definition = ttl_escape(s["definition"])
-            out_lines.append(f"<{s_iri}> a skos:ConceptScheme ;")
-            out_lines.append(f"  skos:prefLabel \"{label}\"@en ;")
-            out_lines.append(f"  skos:definition \"{definition}\"@en ;")
-            if s["scheme_uri"]:
-                out_lines.append(f"  dcterms:identifier \"{ttl_escape(s['scheme_uri'])}\" ;")
-            out_lines[-1] = out_lines[-1].rstrip(" ;") + " ."
-            out_lines.append("")
-
-        # Classification items as concepts
-        cis = conn.execute(
-            """
-            SELECT ri.uuid, ri.preferred_name, ri.definition, ci.scheme_uuid, ci.parent_uuid, ci.item_code
-            FROM classification_item ci
-            JOIN registrable_item ri ON ri.uuid = ci.uuid
-            """
-        ).fetchall()
-
-        for c in cis:
-            c_iri = iri(base, c["uuid"])
-            label = ttl_escape(c["preferred_name"])
-            definition = ttl_escape(c["definition"])
-            scheme_iri = iri(base, c["scheme_uuid"])
-            out_lines.append(f"<{c_iri}> a skos:Concept ;")
-            out_lines.append(f"  skos:inScheme <{scheme_iri}> ;")
-            out_lines.append(f"  skos:prefLabel \"{label}\"@en ;")
-            out_lines.append(f"  skos:definition \"{definition}\"@en ;")
-            if c["item_code"]:
-                out_lines.append(f"  dcterms:identifier \"{ttl_escape(c['item_code'])}\" ;")
-            if c["parent_uuid"]:
-                out_lines.append(f"  skos:broader <{iri(base, c['parent_uuid'])}> ;")
-            out_lines[-1] = out_lines[-1].rstrip(" ;") + " ."
-            out_lines.append("")
-
-        # All registrable items as concepts
-        items = conn.execute("SELECT uuid, item_type, preferred_name, definition FROM registrable_item").fetchall()
-        for it in items:
-            it_iri = iri(base, it["uuid"])
-            label = ttl_escape(it["preferred_name"])
-            definition = ttl_escape(it["definition"])
-            out_lines.append(f"<{it_iri}> a skos:Concept ;")
-            out_lines.append(f"  skos:inScheme <{scheme_items}> ;")
-            out_lines.append(f"  skos:prefLabel \"{label}\"@en ;")
-            out_lines.append(f"  skos:definition \"{definition}\"@en ;")
-            out_lines.append(f"  dcterms:type \"{ttl_escape(it['item_type'])}\" ;")
-            out_lines[-1] = out_lines[-1].rstrip(" ;") + " ."
-            out_lines.append("")
-
-        # Designations as labels
-        des = conn.execute(
-            """
-            SELECT d.item_uuid, d.language_tag, d.designation, d.designation_type, d.is_preferred
-            FROM designation d
-            """
-        ).fetchall()
-        for d in des:
-            subj = f"<{iri(base, d['item_uuid'])}>"
-            lang = d["language_tag"] or "und"
-            text = ttl_escape(d["designation"])
-            if d["designation_type"] == "preferred" or d["is_preferred"] == 1:
-                pred = "skos:prefLabel"
-            else:
-                pred = "skos:altLabel"
-            out_lines.append(f"{subj} {pred} \"{text}\"@{lang} .")
-
-        out_lines.append("")
-
-        # Item classifications -> dcterms:subject (item concept -> classification concept)
-        ics = conn.execute(
-            """
-            SELECT item_uuid, classification_item_uuid
-            FROM item_classification
-            """
-        ).fetchall()
-        for ic in ics:
-            out_lines.append(f"<{iri(base, ic['item_uuid'])}> dcterms:subject <{iri(base, ic['classification_item_uuid'])}> .")
+        # Statements are written to the file as they are produced instead of being
+        # collected and joined at the end. Each chunk starts with the newline that
+        # separates it from the previous one, so the file has no trailing newline.
+        # Rows are read as plain tuples straight off the cursor.
+        cur = conn.cursor()
+        cur.row_factory = None
 
         out = Path(args.out)
         out.parent.mkdir(parents=True, exist_ok=True)
-        out.write_text("\n".join(out_lines), encoding="utf-8")
+        with out.open("w", encoding="utf-8", buffering=1 << 20) as f:
+            w = f.write
+            w("@prefix skos: <http://www.w3.org/2004/02/skos/core#> .")
+            w("\n@prefix dcterms: <http://purl.org/dc/terms/> .")
+            w("\n@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .")
+            w("\n")
+
+            # Generic scheme for all items
+            scheme_items = "urn:mdr:items"
+            w(f"\n<{scheme_items}> a skos:ConceptScheme ; skos:prefLabel \"MDR Items\"@en .")
+            w("\n")
+
+            # Classification schemes
+            cur.execute(
+                """
+                SELECT ri.uuid, ri.preferred_name, ri.definition, cs.scheme_uri
+                FROM classification_scheme cs
+                JOIN registrable_item ri ON ri.uuid = cs.uuid
+                """
+            )
+            for uuid, name, definition, scheme_uri in cur:
+                props = [
+                    f"  skos:prefLabel \"{ttl_escape(name)}\"@en",
+                    f"  skos:definition \"{ttl_escape(definition)}\"@en",
+                ]
+                if scheme_uri:
+                    props.append(f"  dcterms:identifier \"{ttl_escape(scheme_uri)}\"")
+                w(f"\n<{iri(base, uuid)}> a skos:ConceptScheme ;\n" + " ;\n".join(props) + " .\n")
+
+            # Classification items as concepts
+            cur.execute(
+                """
+                SELECT ri.uuid, ri.preferred_name, ri.definition, ci.scheme_uuid, ci.parent_uuid, ci.item_code
+                FROM classification_item ci
+                JOIN registrable_item ri ON ri.uuid = ci.uuid
+                """
+            )
+            for uuid, name, definition, scheme_uuid, parent_uuid, item_code in cur:
+                props = [
+                    f"  skos:inScheme <{iri(base, scheme_uuid)}>",
+                    f"  skos:prefLabel \"{ttl_escape(name)}\"@en",
+                    f"  skos:definition \"{ttl_escape(definition)}\"@en",
+                ]
+                if item_code:
+                    props.append(f"  dcterms:identifier \"{ttl_escape(item_code)}\"")
+                if parent_uuid:
+                    props.append(f"  skos:broader <{iri(base, parent_uuid)}>")
+                w(f"\n<{iri(base, uuid)}> a skos:Concept ;\n" + " ;\n".join(props) + " .\n")
+
+            # All registrable items as concepts
+            cur.execute("SELECT uuid, item_type, preferred_name, definition FROM registrable_item")
+            for uuid, item_type, name, definition in cur:
+                w(
+                    f"\n<{iri(base, uuid)}> a skos:Concept ;"
+                    f"\n  skos:inScheme <{scheme_items}> ;"
+                    f"\n  skos:prefLabel \"{ttl_escape(name)}\"@en ;"
+                    f"\n  skos:definition \"{ttl_escape(definition)}\"@en ;"
+                    f"\n  dcterms:type \"{ttl_escape(item_type)}\" .\n"
+                )
+
+            # Designations as labels
+            cur.execute(
+                """
+                SELECT d.item_uuid, d.language_tag, d.designation, d.designation_type, d.is_preferred
+                FROM designation d
+                """
+            )
+            for item_uuid, language_tag, designation, designation_type, is_preferred in cur:
+                lang = language_tag or "und"
+                if designation_type == "preferred" or is_preferred == 1:
+                    pred = "skos:prefLabel"
+                else:
+                    pred = "skos:altLabel"
+                w(f"\n<{iri(base, item_uuid)}> {pred} \"{ttl_escape(designation)}\"@{lang} .")
+
+            w("\n")
+
+            # Item classifications -> dcterms:subject (item concept -> classification concept)
+            cur.execute(
+                """
+                SELECT item_uuid, classification_item_uuid
+                FROM item_classification
+                """
+            )
+            for item_uuid, ci_uuid in cur:
+                w(f"\n<{iri(base, item_uuid)}> dcterms:subject <{iri(base, ci_uuid)}> .")
+
         print(f"OK: Exported SKOS TTL {out.resolve()}")
     finally:
         conn.close()
@@ -3,15 +3,9 @@
 from __future__ import annotations
 
 import argparse
-import json
 from pathlib import Path
 
-from mdr_gtk.db import connect
-from mdr_gtk.fhir_ingest import import_fhir_bundle_json
-from mdr_gtk.util import read_text
-
-
-from mdr_gtk.services import ensure_schema_applied
+from mdr_gtk.db import connect, fast_ingest_default
 
 
 def _detect_xml(bundle_path: Path, text: str) -> bool:
@@ -49,8 +43,14 @@ def main() -> None:
     p.add_argument("--partition", default=None, help="Optional partition key")
     p.add_argument("--no-refs", action="store_true", help="Do not extract reference edges")
     p.add_argument("bundle", help="Path to FHIR Bundle (JSON or XML)")
+    p.add_argument("--fast", action="store_true",
+                   help="Skip fsync on commit (synchronous=OFF); also enabled by MDR_FAST_INGEST=1")
     args = p.parse_args()
 
+    # the ingest stack is imported only once the arguments are valid (fast --help)
+    from mdr_gtk.fhir_ingest import import_fhir_bundle_json_text
+    from mdr_gtk.services import ensure_schema_applied
+
     bundle_path = Path(args.bundle)
     if not bundle_path.exists():
         raise SystemExit(f"Bundle file not found: {bundle_path}")
@@ -58,7 +58,7 @@ def main() -> None:
     raw_text = bundle_path.read_text(encoding="utf-8", errors="replace")
     is_xml = _detect_xml(bundle_path, raw_text)
 
-    conn = connect(args.db)
+    conn = connect(args.db, fast=args.fast or fast_ingest_default())
     ensure_schema_applied(conn)
     try:
         source_name = args.source or f"file:{bundle_path.name}"
@@ -73,10 +73,9 @@ def main() -> None:
                 extract_references=extract_refs,
             )
         else:
-            bundle_obj = json.loads(raw_text)
-            res = import_fhir_bundle_json(
+            res = import_fhir_bundle_json_text(
                 conn,
-                bundle_obj,
+                raw_text,
                 source_name=source_name,
                 partition_key=args.partition,
                 extract_references=extract_refs,
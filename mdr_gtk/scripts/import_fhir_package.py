@@ -5,11 +5,7 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-from mdr_gtk.db import connect
-from mdr_gtk.fhir_ingest import import_fhir_package
-
-
-from mdr_gtk.services import ensure_schema_applied
+from mdr_gtk.db import connect, fast_ingest_default
 
 
 def main() -> None:
@@ -19,11 +15,19 @@ def main() -> None:
     p.add_argument("--partition", default=None, help="Optional partition key")
     p.add_argument("--refs", action="store_true", help="Extract reference edges (default: off)")
     p.add_argument("package_path", help="Path to .tgz/.tar.gz or unpacked directory")
+    p.add_argument("--fast", action="store_true",
+                   help="Skip fsync on commit (synchronous=OFF); also enabled by MDR_FAST_INGEST=1")
+    p.add_argument("--workers", type=int, default=None,
+                   help="Processes for parsing/hashing (default: CPU count for large packages; 1 = no pool)")
     args = p.parse_args()
 
+    # the ingest stack is imported only once the arguments are valid (fast --help)
+    from mdr_gtk.fhir_ingest import import_fhir_package
+    from mdr_gtk.services import ensure_schema_applied
+
     pp = Path(args.package_path)
 
-    conn = connect(args.db)
+    conn = connect(args.db, fast=args.fast or fast_ingest_default())
     ensure_schema_applied(conn)
     try:
         res = import_fhir_package(
@@ -32,6 +36,7 @@ def main() -> None:
             source_name=args.source or f"file:{pp.name}",
             partition_key=args.partition,
             extract_references=bool(args.refs),
+            workers=args.workers,
         )
     finally:
         conn.close()
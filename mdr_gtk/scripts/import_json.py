@@ -8,24 +8,35 @@ Notes:
 from __future__ import annotations
 
 import argparse
-import json
+import functools
+import itertools
 from pathlib import Path
 
 from mdr_gtk.db import connect
+from mdr_gtk.util import json_loads
 
 
-def upsert(conn, table: str, row: dict):
-    cols = list(row.keys())
+@functools.lru_cache(maxsize=None)
+def build_upsert_sql(table: str, cols: tuple[str, ...]) -> str:
     placeholders = ", ".join(["?"] * len(cols))
     col_list = ", ".join(cols)
     # SQLite upsert requires a conflict target; all our tables use uuid PK.
     update_cols = [c for c in cols if c != "uuid"]
     update_stmt = ", ".join([f"{c}=excluded.{c}" for c in update_cols]) if update_cols else ""
     if update_stmt:
-        sql = f"INSERT INTO {table}({col_list}) VALUES({placeholders}) ON CONFLICT(uuid) DO UPDATE SET {update_stmt}"
-    else:
-        sql = f"INSERT INTO {table}({col_list}) VALUES({placeholders}) ON CONFLICT(uuid) DO NOTHING"
-    conn.execute(sql, [row[c] for c in cols])
+        return f"INSERT INTO {table}({col_list}) VALUES({placeholders}) ON CONFLICT(uuid) DO UPDATE SET {update_stmt}"
+    return f"INSERT INTO {table}({col_list}) VALUES({placeholders}) ON CONFLICT(uuid) DO NOTHING"
+
+
+def upsert_rows(conn, table: str, rows: list[dict]) -> None:
+    """Upsert ``rows`` in order, one executemany per run of rows with the same columns.
+
+    Exports write every row of a table with the same keys, so this is normally a
+    single statement per table. Runs are kept in file order rather than grouped
+    by column set, so rows are applied in the order the file lists them.
+    """
+    for cols, run in itertools.groupby(rows, key=lambda r: tuple(r.keys())):
+        conn.executemany(build_upsert_sql(table, cols), [[r[c] for c in cols] for r in run])
 
 
 def main() -> None:
@@ -35,19 +46,20 @@ def main() -> None:
     args = p.parse_args()
 
     path = Path(args.infile)
-    data = json.loads(path.read_text(encoding="utf-8"))
+    data = json_loads(path.read_bytes())
 
     conn = connect(args.db)
     try:
-        conn.execute("BEGIN;")
+        # take the write lock up front instead of upgrading mid-import (which can
+        # fail with SQLITE_BUSY under WAL); FK checks run once, at commit
+        conn.execute("BEGIN IMMEDIATE;")
+        conn.execute("PRAGMA defer_foreign_keys = ON;")
 
         # Order: no-FK -> base -> extensions -> relations
         for table in ["context", "registration_authority"]:
-            for row in data.get(table, []):
-                upsert(conn, table, row)
+            upsert_rows(conn, table, data.get(table, []))
 
-        for row in data.get("registrable_item", []):
-            upsert(conn, "registrable_item", row)
+        upsert_rows(conn, "registrable_item", data.get("registrable_item", []))
 
         # 1:1 extension tables
         for table in [
@@ -61,13 +73,11 @@ def main() -> None:
             "value_domain",
             "data_element",
         ]:
-            for row in data.get(table, []):
-                upsert(conn, table, row)
+            upsert_rows(conn, table, data.get(table, []))
 
         # 1:n
         for table in ["designation", "permissible_value", "item_classification", "item_version"]:
-            for row in data.get(table, []):
-                upsert(conn, table, row)
+            upsert_rows(conn, table, data.get(table, []))
 
         conn.commit()
         print(f"OK: Imported {path.resolve()} into {args.db}")
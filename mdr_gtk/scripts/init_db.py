@@ -7,7 +7,7 @@ import argparse
 from pathlib import Path
 import sqlite3
 
-from mdr_gtk.db import connect
+from mdr_gtk.db import connect, ensure_indexes
 from mdr_gtk.util import read_text
 
 
@@ -28,6 +28,7 @@ def main() -> None:
     conn = connect(str(db_path))
     try:
         apply_sql(conn, read_text("migrations/schema.sql"))
+        ensure_indexes(conn)  # FTS indexes are not part of schema.sql
         if args.seed:
             apply_sql(conn, read_text("migrations/seed.sql"))
     finally:
@@ -5,7 +5,7 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterator, Optional, Any
 
-from .db import connect
+from .db import connect, ensure_indexes, fast_ingest_default
 from .util import read_text
 from .fhir_ingest import import_fhir_bundle_json, import_fhir_package
 
@@ -15,12 +15,13 @@ from .fhir_ingest import import_fhir_bundle_json, import_fhir_package
 #   and centralizes schema auto-application in one place.
 
 
-def _table_exists(conn, name: str) -> bool:
-    row = conn.execute(
-        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
-        (name,),
-    ).fetchone()
-    return row is not None
+# Tables whose presence marks an initialized DB: the ISO11179 core table and the FHIR
+# ingest table (either one missing indicates an uninitialized DB).
+_REQUIRED_TABLES = ("registrable_item", "fhir_ingest_run")
+_SQL_COUNT_REQUIRED_TABLES = (
+    "SELECT count(*) FROM sqlite_master WHERE type='table' AND name IN ("
+    + ", ".join("?" * len(_REQUIRED_TABLES)) + ")"
+)
 
 
 def ensure_schema_applied(conn) -> None:
@@ -28,21 +29,24 @@ def ensure_schema_applied(conn) -> None:
 
     This is used by CLI scripts and (optionally) by the GUI to make first-run
     usage foolproof: you can point to an empty SQLite file and the schema will
-    be installed.
+    be installed. Existing databases get the indexes added since their schema
+    was applied (:func:`mdr_gtk.db.ensure_indexes`).
     """
-    # We consider the DB initialized if both the ISO11179 core table and the
-    # FHIR ingest table exist. (Either one missing indicates an uninitialized DB.)
-    core_ok = _table_exists(conn, "registrable_item")
-    fhir_ok = _table_exists(conn, "fhir_ingest_run")
-    if not (core_ok and fhir_ok):
+    # one sqlite_master probe for all required tables
+    (found,) = conn.execute(_SQL_COUNT_REQUIRED_TABLES, _REQUIRED_TABLES).fetchone()
+    if found < len(_REQUIRED_TABLES):
         conn.executescript(read_text("migrations/schema.sql"))
         conn.commit()
+    ensure_indexes(conn)
 
 
 @contextmanager
-def db_conn(db_path: str) -> Iterator[Any]:
-    """Context manager that opens *and closes* an sqlite connection."""
-    conn = connect(db_path)
+def db_conn(db_path: str, *, fast: bool = False) -> Iterator[Any]:
+    """Context manager that opens *and closes* an sqlite connection.
+
+    ``fast`` is passed to :func:`mdr_gtk.db.connect` (bulk-ingest connections only).
+    """
+    conn = connect(db_path, fast=fast)
     try:
         ensure_schema_applied(conn)
         yield conn
@@ -68,15 +72,15 @@ class MDRServices:
         return conn
 
     @contextmanager
-    def conn(self):
+    def conn(self, *, fast: bool = False):
         """Open a connection and ensure it is closed."""
-        with db_conn(self.db_path) as c:
+        with db_conn(self.db_path, fast=fast) as c:
             yield c
 
     # --- Ingest operations ---
 
     def import_bundle_json(self, bundle_obj: dict, *, source_name: str, partition_key: Optional[str] = None, extract_references: bool = True):
-        with self.conn() as conn:
+        with self.conn(fast=fast_ingest_default()) as conn:
             return import_fhir_bundle_json(
                 conn,
                 bundle_obj,
@@ -86,7 +90,7 @@ class MDRServices:
             )
 
     def import_package(self, package_path: str, *, source_name: str, partition_key: Optional[str] = None, extract_references: bool = False):
-        with self.conn() as conn:
+        with self.conn(fast=fast_ingest_default()) as conn:
             return import_fhir_package(
                 conn,
                 package_path,
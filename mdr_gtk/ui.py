@@ -2,19 +2,16 @@ from __future__ import annotations
 
 import gi
 gi.require_version("Gtk", "4.0")
-from gi.repository import Gtk, Gio
+from gi.repository import Gtk, Gio, GObject
 import json
 import csv
 from pathlib import Path
 
-from mdr_gtk.db import connect
+from mdr_gtk.db import connect, has_curated_fts
 from mdr_gtk.services import ensure_schema_applied
 from mdr_gtk.gui_services import GUIServiceFacade
 from mdr_gtk.repositories import Repo, new_uuid
-import json
-from pathlib import Path
-from mdr_gtk.fhir_ingest import import_fhir_bundle_json, import_fhir_package
-from mdr_gtk.fhir_export import export_curated_bundle_json, export_curated_bundle_xml
+# fhir_export is imported by the curated export dialogs on first use
 from mdr_gtk.fhir_repo import get_curated_by_ident, get_variants_for_curated, get_raw_json_by_sha
 from mdr_gtk.fhir_filter import CuratedFilter, build_curated_query
 from mdr_gtk.fhir_selected_export import export_selected_bundle_json, export_selected_bundle_xml
@@ -24,14 +21,31 @@ from mdr_gtk.models import RegistrableItem
 
 
 
+class MDRItem(GObject.Object):
+    """One row of the middle item list (the columns _item_bind shows)."""
+
+    __gtype_name__ = "MDRItem"
+
+    uuid = GObject.Property(type=str)
+    name = GObject.Property(type=str)
+    version = GObject.Property(type=int, default=1)
+    updated = GObject.Property(type=str)
+
+
+# _RefDropDown adds a search field to lists at least this long.
+_REF_SEARCH_MIN_OPTIONS = 500
+
+
 class _RefDropDown:
     """Small helper that maps a Gtk.DropDown selection to UUID values.
 
     `options` is a list of (uuid, label) tuples.
     If `allow_none` is True, the first option is an empty selection.
+    If `searchable` is True, or there are many options, the popup gets a
+    type-ahead search field.
     """
 
-    def __init__(self, options, allow_none: bool = False, none_label: str = "—"):
+    def __init__(self, options, allow_none: bool = False, none_label: str = "—", searchable: bool = False):
         self.allow_none = allow_none
         self._uuids = []
         labels = []
@@ -50,12 +64,23 @@ class _RefDropDown:
             labels = [none_label]
 
         self.widget = Gtk.DropDown.new_from_strings(labels)
+        if searchable or len(labels) >= _REF_SEARCH_MIN_OPTIONS:
+            # the popup's list view only realizes visible rows; what a long list
+            # lacks is a way to get to a row without scrolling
+            self.widget.set_expression(Gtk.PropertyExpression.new(Gtk.StringObject, None, "string"))
+            self.widget.set_enable_search(True)
+        # uuid -> row, for set_selected_uuid (several calls per form load)
+        self._uuid_to_index = {u: i for i, u in enumerate(self._uuids) if u is not None}
 
         # Default selection:
         # - allow_none -> select the empty row
         # - otherwise -> select first real row (index 0)
         self.widget.set_selected(0)
 
+    def reset(self) -> None:
+        """Back to the initial selection (the empty row, or the first option)."""
+        self.widget.set_selected(0)
+
     def get_selected_uuid(self):
         idx = int(self.widget.get_selected())
         if idx < 0 or idx >= len(self._uuids):
@@ -69,9 +94,8 @@ class _RefDropDown:
                 self.widget.set_selected(0)
             return
 
-        try:
-            idx = self._uuids.index(uuid_value)
-        except ValueError:
+        idx = self._uuid_to_index.get(uuid_value)
+        if idx is None:
             return
         self.widget.set_selected(idx)
 ITEM_TYPES = [
@@ -86,6 +110,14 @@ ITEM_TYPES = [
     ("CLASSIFICATION_ITEM", "Classification Items"),
 ]
 
+# Item types listed by the reference dropdowns of each type's extra form.
+_EXTRA_REF_TYPES = {
+    "VALUE_DOMAIN": ("CONCEPTUAL_DOMAIN", "REPRESENTATION_CLASS"),
+    "DATA_ELEMENT_CONCEPT": ("OBJECT_CLASS", "PROPERTY", "CONCEPTUAL_DOMAIN"),
+    "DATA_ELEMENT": ("DATA_ELEMENT_CONCEPT", "VALUE_DOMAIN"),
+    "CLASSIFICATION_ITEM": ("CLASSIFICATION_SCHEME", "CLASSIFICATION_ITEM"),
+}
+
 
 class MDRWindow(Gtk.ApplicationWindow):
 
@@ -105,6 +137,9 @@ class MDRWindow(Gtk.ApplicationWindow):
 
         self.current_type = ITEM_TYPES[0][0]
         self.current_uuid: str | None = None
+        self._list_query = ""  # stripped search text of the last _refresh_list
+        # item_type -> (refs lists the form was built from, the form's widgets)
+        self._extra_cache: dict[str, tuple[list, list]] = {}
         self.log_lines: list[str] = []
 
         self._build_ui()
@@ -207,7 +242,7 @@ class MDRWindow(Gtk.ApplicationWindow):
         root.set_start_child(left_box)
 
         # Middle: items list
-        self.item_store = Gio.ListStore.new(Gtk.StringObject)
+        self.item_store = Gio.ListStore.new(MDRItem)
         self.item_selection = Gtk.SingleSelection.new(self.item_store)
         self.item_selection.connect("notify::selected", self._on_item_selected)
 
@@ -340,13 +375,8 @@ class MDRWindow(Gtk.ApplicationWindow):
         title = box.get_first_child()
         sub = title.get_next_sibling()
         obj = list_item.get_item()
-        s = obj.get_string()
-        parts = s.split("|", 3)
-        name = parts[1]
-        version = parts[2]
-        updated = parts[3]
-        title.set_label(name)
-        sub.set_label(f"v{version} • updated {updated}")
+        title.set_label(obj.name)
+        sub.set_label(f"v{obj.version} • updated {obj.updated}")
 
     # ----- events -----
     def _on_type_selected(self, selection, _pspec):
@@ -361,6 +391,10 @@ class MDRWindow(Gtk.ApplicationWindow):
         self._refresh_list()
 
     def _on_search_changed(self, _entry):
+        # search-changed is already debounced by the entry (search-delay); this only
+        # skips edits that leave the query itself unchanged, e.g. trailing spaces
+        if self.search.get_text().strip() == self._list_query:
+            return
         self._refresh_list()
 
     def _on_item_selected(self, selection, _pspec):
@@ -368,7 +402,7 @@ class MDRWindow(Gtk.ApplicationWindow):
         if idx < 0:
             return
         obj = self.item_store.get_item(idx)
-        item_uuid = obj.get_string().split("|", 3)[0]
+        item_uuid = obj.uuid
         self.current_uuid = item_uuid
         self._load_item(item_uuid)
 
@@ -476,12 +510,13 @@ class MDRWindow(Gtk.ApplicationWindow):
 
     # ----- data -----
     def _refresh_list(self):
-        q = self.search.get_text().strip()
+        q = self._list_query = self.search.get_text().strip()
         rows = self.repo.list_items(self.current_type, q if q else None)
-        self.item_store.remove_all()
-        for r in rows:
-            s = f"{r['uuid']}|{r['preferred_name']}|{r['version']}|{r['updated_at']}"
-            self.item_store.append(Gtk.StringObject.new(s))
+        # one splice = one items-changed emission instead of remove_all + one per append
+        self.item_store.splice(0, self.item_store.get_n_items(), [
+            MDRItem(uuid=r["uuid"], name=r["preferred_name"], version=r["version"], updated=r["updated_at"])
+            for r in rows
+        ])
 
     def _clear_form(self):
         self.f_uuid.set_text("")
@@ -568,22 +603,34 @@ class MDRWindow(Gtk.ApplicationWindow):
         for c in list(self.extra):
             self.extra.remove(c)
 
-        if self.current_type == "VALUE_DOMAIN":
-            self._build_value_domain(load_uuid)
-        elif self.current_type == "DATA_ELEMENT_CONCEPT":
-            self._build_dec(load_uuid)
-        elif self.current_type == "DATA_ELEMENT":
-            self._build_data_element(load_uuid)
-        elif self.current_type == "CONCEPTUAL_DOMAIN":
-            self._build_conceptual_domain(load_uuid)
-        elif self.current_type == "CLASSIFICATION_SCHEME":
-            self._build_classification_scheme(load_uuid)
-        elif self.current_type == "CLASSIFICATION_ITEM":
-            self._build_classification_item(load_uuid)
+        t = self.current_type
+        build, load = {
+            "VALUE_DOMAIN": (self._build_value_domain, self._load_value_domain),
+            "DATA_ELEMENT_CONCEPT": (self._build_dec, self._load_dec),
+            "DATA_ELEMENT": (self._build_data_element, self._load_data_element),
+            "CONCEPTUAL_DOMAIN": (self._build_conceptual_domain, self._load_conceptual_domain),
+            "CLASSIFICATION_SCHEME": (self._build_classification_scheme, self._load_classification_scheme),
+            "CLASSIFICATION_ITEM": (self._build_classification_item, self._load_classification_item),
+        }.get(t, (self._build_no_extra, None))
+
+        # The widgets of a type's form are built once and then only refilled. The
+        # refs lists are the Repo's cached objects, so getting the same lists back
+        # means the dropdowns built from them still show current options.
+        refs = self.repo.fetch_refs_many(_EXTRA_REF_TYPES.get(t, ()))
+        cached = self._extra_cache.get(t)
+        if cached is None or any(a is not b for a, b in zip(cached[0], refs.values())):
+            build(refs)
+            self._extra_cache[t] = (list(refs.values()), list(self.extra))
         else:
-            self.extra.append(Gtk.Label(label="Keine zusätzlichen Felder für diesen Typ.", xalign=0))
+            for w in cached[1]:
+                self.extra.append(w)
+        if load is not None:
+            load(load_uuid)
+
+    def _build_no_extra(self, _refs):
+        self.extra.append(Gtk.Label(label="Keine zusätzlichen Felder für diesen Typ.", xalign=0))
 
-    def _build_value_domain(self, load_uuid: str | None):
+    def _build_value_domain(self, refs):
         self.extra.append(Gtk.Label(label="Value Domain Felder", xalign=0))
         grid = Gtk.Grid(column_spacing=12, row_spacing=10)
         self.extra.append(grid)
@@ -594,11 +641,8 @@ class MDRWindow(Gtk.ApplicationWindow):
         self.vd_maxlen.set_numeric(True)
         self.vd_format = Gtk.Entry()
 
-        cd_opts = self.repo.fetch_refs("CONCEPTUAL_DOMAIN")
-        self.vd_cd = _RefDropDown(cd_opts, allow_none=True)
-
-        rc_opts = self.repo.fetch_refs("REPRESENTATION_CLASS")
-        self.vd_rc = _RefDropDown(rc_opts, allow_none=True)
+        self.vd_cd = _RefDropDown(refs["CONCEPTUAL_DOMAIN"], allow_none=True)
+        self.vd_rc = _RefDropDown(refs["REPRESENTATION_CLASS"], allow_none=True)
 
         def add(r, label, w):
             grid.attach(Gtk.Label(label=label, xalign=0), 0, r, 1, 1)
@@ -625,6 +669,15 @@ class MDRWindow(Gtk.ApplicationWindow):
         btns.append(self.btn_pv_del)
         self.extra.append(btns)
 
+    def _load_value_domain(self, load_uuid: str | None):
+        self.vd_datatype.set_selected(0)
+        self.vd_unit.set_text("")
+        self.vd_maxlen.set_value(0)
+        self.vd_format.set_text("")
+        self.vd_cd.reset()
+        self.vd_rc.reset()
+        for c in list(self.pv_box):
+            self.pv_box.remove(c)
         if load_uuid:
             row = self.repo.get_value_domain(load_uuid)
             if row:
@@ -674,18 +727,14 @@ class MDRWindow(Gtk.ApplicationWindow):
             sort_order = int(so) if so else None
             self.repo.upsert_permissible_value(row.pv_uuid, vd_uuid, code, meaning, sort_order)
 
-    def _build_dec(self, load_uuid: str | None):
+    def _build_dec(self, refs):
         self.extra.append(Gtk.Label(label="Data Element Concept Felder", xalign=0))
         grid = Gtk.Grid(column_spacing=12, row_spacing=10)
         self.extra.append(grid)
 
-        oc_opts = self.repo.fetch_refs("OBJECT_CLASS")
-        prop_opts = self.repo.fetch_refs("PROPERTY")
-        cd_opts = self.repo.fetch_refs("CONCEPTUAL_DOMAIN")
-
-        self.dec_oc = _RefDropDown(oc_opts, allow_none=False)
-        self.dec_prop = _RefDropDown(prop_opts, allow_none=False)
-        self.dec_cd = _RefDropDown(cd_opts, allow_none=True)
+        self.dec_oc = _RefDropDown(refs["OBJECT_CLASS"], allow_none=False)
+        self.dec_prop = _RefDropDown(refs["PROPERTY"], allow_none=False)
+        self.dec_cd = _RefDropDown(refs["CONCEPTUAL_DOMAIN"], allow_none=True)
 
         def add(r, label, w):
             grid.attach(Gtk.Label(label=label, xalign=0), 0, r, 1, 1)
@@ -695,6 +744,10 @@ class MDRWindow(Gtk.ApplicationWindow):
         add(1, "Property*", self.dec_prop.widget)
         add(2, "Conceptual Domain", self.dec_cd.widget)
 
+    def _load_dec(self, load_uuid: str | None):
+        self.dec_oc.reset()
+        self.dec_prop.reset()
+        self.dec_cd.reset()
         if load_uuid:
             row = self.repo.get_data_element_concept(load_uuid)
             if row:
@@ -702,29 +755,29 @@ class MDRWindow(Gtk.ApplicationWindow):
                 self.dec_prop.set_selected_uuid(row["property_uuid"])
                 self.dec_cd.set_selected_uuid(row["conceptual_domain_uuid"])
 
-    def _build_data_element(self, load_uuid: str | None):
+    def _build_data_element(self, refs):
         self.extra.append(Gtk.Label(label="Data Element Felder", xalign=0))
         grid = Gtk.Grid(column_spacing=12, row_spacing=10)
         self.extra.append(grid)
 
-        dec_opts = self.repo.fetch_refs("DATA_ELEMENT_CONCEPT")
-        vd_opts = self.repo.fetch_refs("VALUE_DOMAIN")
-
-        self.de_dec = _RefDropDown(dec_opts, allow_none=False)
-        self.de_vd = _RefDropDown(vd_opts, allow_none=False)
+        self.de_dec = _RefDropDown(refs["DATA_ELEMENT_CONCEPT"], allow_none=False)
+        self.de_vd = _RefDropDown(refs["VALUE_DOMAIN"], allow_none=False)
 
         grid.attach(Gtk.Label(label="Data Element Concept*", xalign=0), 0, 0, 1, 1)
         grid.attach(self.de_dec.widget, 1, 0, 1, 1)
         grid.attach(Gtk.Label(label="Value Domain*", xalign=0), 0, 1, 1, 1)
         grid.attach(self.de_vd.widget, 1, 1, 1, 1)
 
+    def _load_data_element(self, load_uuid: str | None):
+        self.de_dec.reset()
+        self.de_vd.reset()
         if load_uuid:
             row = self.repo.get_data_element(load_uuid)
             if row:
                 self.de_dec.set_selected_uuid(row["data_element_concept_uuid"])
                 self.de_vd.set_selected_uuid(row["value_domain_uuid"])
 
-    def _build_conceptual_domain(self, load_uuid: str | None):
+    def _build_conceptual_domain(self, _refs):
         self.extra.append(Gtk.Label(label="Conceptual Domain Felder", xalign=0))
         grid = Gtk.Grid(column_spacing=12, row_spacing=10)
         self.extra.append(grid)
@@ -733,34 +786,37 @@ class MDRWindow(Gtk.ApplicationWindow):
         grid.attach(Gtk.Label(label="Description", xalign=0), 0, 0, 1, 1)
         grid.attach(self.cd_desc, 1, 0, 1, 1)
 
+    def _load_conceptual_domain(self, load_uuid: str | None):
+        self.cd_desc.set_text("")
         if load_uuid:
             row = self.conn.execute("SELECT description FROM conceptual_domain WHERE uuid=?", (load_uuid,)).fetchone()
             if row:
                 self.cd_desc.set_text(row["description"] or "")
 
-    def _build_classification_scheme(self, load_uuid: str | None):
+    def _build_classification_scheme(self, _refs):
         self.extra.append(Gtk.Label(label="Classification Scheme Felder", xalign=0))
         grid = Gtk.Grid(column_spacing=12, row_spacing=10)
         self.extra.append(grid)
         self.cs_uri = Gtk.Entry()
         grid.attach(Gtk.Label(label="Scheme URI", xalign=0), 0, 0, 1, 1)
         grid.attach(self.cs_uri, 1, 0, 1, 1)
+
+    def _load_classification_scheme(self, load_uuid: str | None):
+        self.cs_uri.set_text("")
         if load_uuid:
             row = self.repo.get_classification_scheme(load_uuid)
             if row:
                 self.cs_uri.set_text(row["scheme_uri"] or "")
 
-    def _build_classification_item(self, load_uuid: str | None):
+    def _build_classification_item(self, refs):
         self.extra.append(Gtk.Label(label="Classification Item Felder", xalign=0))
         grid = Gtk.Grid(column_spacing=12, row_spacing=10)
         self.extra.append(grid)
 
-        scheme_opts = self.repo.fetch_refs("CLASSIFICATION_SCHEME")
-        self.ci_scheme = _RefDropDown(scheme_opts, allow_none=False)
+        self.ci_scheme = _RefDropDown(refs["CLASSIFICATION_SCHEME"], allow_none=False)
 
         # parent selection: allow selecting any classification item
-        parent_opts = self.repo.fetch_refs("CLASSIFICATION_ITEM")
-        self.ci_parent = _RefDropDown(parent_opts, allow_none=True)
+        self.ci_parent = _RefDropDown(refs["CLASSIFICATION_ITEM"], allow_none=True, searchable=True)
 
         self.ci_code = Gtk.Entry()
 
@@ -771,6 +827,10 @@ class MDRWindow(Gtk.ApplicationWindow):
         grid.attach(Gtk.Label(label="Item code", xalign=0), 0, 2, 1, 1)
         grid.attach(self.ci_code, 1, 2, 1, 1)
 
+    def _load_classification_item(self, load_uuid: str | None):
+        self.ci_scheme.reset()
+        self.ci_parent.reset()
+        self.ci_code.set_text("")
         if load_uuid:
             row = self.repo.get_classification_item(load_uuid)
             if row:
@@ -860,7 +920,7 @@ class MDRWindow(Gtk.ApplicationWindow):
 
         # build add dropdown with all classification items
         ci_opts = self.repo.fetch_refs("CLASSIFICATION_ITEM")
-        self.ic_add_dd = _RefDropDown(ci_opts, allow_none=True)
+        self.ic_add_dd = _RefDropDown(ci_opts, allow_none=True, searchable=True)
         # place dropdown at top
         top = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=6)
         top.append(Gtk.Label(label="Classification Item wählen:", xalign=0))
@@ -1013,6 +1073,9 @@ class MDRWindow(Gtk.ApplicationWindow):
         except Exception:
             self.conn.rollback()
             raise
+        finally:
+            # registrable_item was written past the Repo
+            self.repo.invalidate_refs()
 
     def _export_csv(self, out_path: str):
         fields = [
@@ -1170,6 +1233,8 @@ class MDRWindow(Gtk.ApplicationWindow):
         except Exception:
             pass
         self.conn = connect(new_path)
+        # the facade holds the old (closed) connection and its schema-checked flag
+        self.services = GUIServiceFacade(self.conn)
         self._ensure_schema()
         self.repo = Repo(self.conn)
         self.db_path = new_path
@@ -1447,7 +1512,7 @@ def _update_selected_ui(self) -> None:
                 except ValueError:
                     self.fhir_type_dd.set_selected(0)
 
-            sql, params = build_curated_query(self.curated_filter)
+            sql, params = build_curated_query(self.curated_filter, use_fts=has_curated_fts(self.conn))
             rows = self.conn.execute(sql, params).fetchall()
             self._fhir_views["curated"].remove_all()
             for r in rows:
@@ -1610,7 +1675,7 @@ def _update_selected_ui(self) -> None:
                 if f:
                     path = f.get_path()
                     try:
-                        res = import_fhir_package(self.conn, path, source_name=f"dir:{Path(path).name}")
+                        res = self.services.import_fhir_package_file(path, source_name=f"dir:{Path(path).name}")
                         self._log(res.message)
                         self._refresh_fhir_views()
                     except Exception as e:
@@ -1630,6 +1695,8 @@ def _update_selected_ui(self) -> None:
                 if f:
                     out = f.get_path()
                     try:
+                        from mdr_gtk.fhir_export import export_curated_bundle_json
+
                         res = export_curated_bundle_json(self.conn, out, limit=2000)
                         self._log(res.message)
                     except Exception as e:
@@ -1663,6 +1730,8 @@ def _update_selected_ui(self) -> None:
                         if f:
                             out = f.get_path()
                             try:
+                                from mdr_gtk.fhir_export import export_curated_bundle_xml
+
                                 res = export_curated_bundle_xml(self.conn, out, limit=2000, mode=mode_str)
                                 self._log(res.message)
                             except Exception as e:
@@ -1950,13 +2019,16 @@ def _mdrwindow_refresh_fhir_views(self) -> None:
             except ValueError:
                 self.fhir_type_dd.set_selected(0)
 
-        sql, params = build_curated_query(self.curated_filter)
-        rows = self.conn.execute(sql, params).fetchall()
+        sql, params = build_curated_query(self.curated_filter, use_fts=has_curated_fts(self.conn))
+        cur = self.conn.cursor()
+        cur.arraysize = 256
+        cur.execute(sql, params)
         self._fhir_views["curated"].remove_all()
-        for r in rows:
-            self._fhir_views["curated"].append(Gtk.StringObject.new(
-                f"{r[0]} | {r[1]} | v={r[2]} | conflict={r[3]} | {r[4]}"
-            ))
+        while rows := cur.fetchmany():
+            for r in rows:
+                self._fhir_views["curated"].append(Gtk.StringObject.new(
+                    f"{r[0]} | {r[1]} | v={r[2]} | conflict={r[3]} | {r[4]}"
+                ))
     except Exception as e:
         self._log(f"FHIR curated view failed: {e}")
 
@@ -1,6 +1,15 @@
 from __future__ import annotations
 
+import json
+import math
 import os
+import re
+from typing import Any
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # optional speedup, stdlib json is the fallback
+    orjson = None  # type: ignore
 
 
 def read_text(rel_path: str) -> str:
@@ -14,3 +23,86 @@ def read_text(rel_path: str) -> str:
         with open(candidate, "r", encoding="utf-8") as f:
             return f.read()
     raise FileNotFoundError(f"Cannot find {rel_path}")
+
+
+# orjson parses integers outside the 64-bit range to float (older releases) or
+# rejects them (newer ones); stdlib json keeps them exact. Such an integer has at
+# least 19 digits (-2**63 - 1 does), so input with a run of 19 digits goes to the
+# stdlib. Digit runs in strings or fractions only cost a fallback.
+_DIGITS_TO_ZERO = bytes.maketrans(b"123456789", b"000000000")
+_LONG_DIGIT_RUN = b"0" * 19
+
+
+def _has_long_digit_run(data: str | bytes) -> bool:
+    raw = data.encode("utf-8", "surrogatepass") if isinstance(data, str) else data
+    # translate + find is a few times faster than re.search(rb"[0-9]{19}")
+    return _LONG_DIGIT_RUN in raw.translate(_DIGITS_TO_ZERO)
+
+
+def json_loads(data: str | bytes) -> Any:
+    """Parse JSON text or UTF-8 bytes, using orjson when it is installed.
+
+    Input orjson rejects or would round but stdlib json parses exactly (NaN,
+    integers beyond 64 bit) falls back to :func:`json.loads`, so results never
+    depend on the backend.
+    """
+    if orjson is not None and not _has_long_digit_run(data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def _has_non_finite(obj: Any) -> bool:
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(map(_has_non_finite, obj.values()))
+    if isinstance(obj, (list, tuple)):
+        return any(map(_has_non_finite, obj))
+    return False
+
+
+def json_dumps_bytes(obj: Any, *, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes in one pass (orjson when installed).
+
+    ``indent=True`` gives 2-space indentation; otherwise output is compact.
+    Non-ASCII characters are written as-is in both backends, and NaN/Infinity
+    are written as the stdlib does (orjson would write null).
+    """
+    if orjson is not None:
+        try:
+            out = orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            # orjson.JSONEncodeError subclasses TypeError (e.g. ints beyond 64 bit)
+            out = None
+        # a non-finite float shows up as null; only then is the object walked
+        if out is not None and not (b"null" in out and _has_non_finite(obj)):
+            return out
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# orjson output that may differ from the stdlib canonical form: floats printed
+# differently (exponent notation, values below 1e-4) and null (stdlib writes
+# NaN/Infinity, orjson writes null). Matches inside strings only cost a fallback.
+_CANON_RISKY = re.compile(rb"(?:^|[:,\[])(?:-?(?:\d+(?:\.\d+)?[eE]|0\.0000)|null)")
+
+
+def json_dumps_canonical(obj: Any) -> bytes:
+    """Sorted-key, compact UTF-8 JSON bytes for content hashing.
+
+    Byte-identical to ``json.dumps(obj, sort_keys=True, separators=(",", ":"),
+    ensure_ascii=False).encode("utf-8")`` whichever backend is used, so stored
+    hashes stay comparable across installs with and without orjson.
+    """
+    if orjson is not None:
+        try:
+            out = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            out = None
+        if out is not None and not _CANON_RISKY.search(out):
+            return out
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
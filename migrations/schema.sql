@@ -65,6 +65,9 @@ CREATE TABLE IF NOT EXISTS registrable_item (
 
 CREATE UNIQUE INDEX IF NOT EXISTS ux_registrable_item_type_name
   ON registrable_item(item_type, preferred_name);
+-- list_items / fetch_refs: filter by type, ordered by name without a sort step
+CREATE INDEX IF NOT EXISTS ix_ri_type_name_nocase
+  ON registrable_item(item_type, preferred_name COLLATE NOCASE);
 
 CREATE TRIGGER IF NOT EXISTS trg_registrable_item_updated
 AFTER UPDATE ON registrable_item
@@ -278,6 +281,8 @@ CREATE TABLE IF NOT EXISTS fhir_raw_resource (
 CREATE INDEX IF NOT EXISTS idx_fhir_raw_resource_run_id ON fhir_raw_resource(run_id);
 CREATE INDEX IF NOT EXISTS idx_fhir_raw_resource_type_id ON fhir_raw_resource(resource_type, logical_id);
 CREATE INDEX IF NOT EXISTS idx_fhir_raw_resource_canonical ON fhir_raw_resource(resource_type, canonical_url, artifact_version);
+-- export join: latest raw row per sha
+CREATE INDEX IF NOT EXISTS ix_raw_sha_firstseen ON fhir_raw_resource(resource_sha256, first_seen_ts DESC);
 
 CREATE TABLE IF NOT EXISTS fhir_curated_resource (
   curated_id INTEGER PRIMARY KEY,
@@ -303,6 +308,9 @@ CREATE TABLE IF NOT EXISTS fhir_curated_resource (
 
 CREATE INDEX IF NOT EXISTS idx_fhir_curated_type_logical ON fhir_curated_resource(resource_type, logical_id);
 CREATE INDEX IF NOT EXISTS idx_fhir_curated_type_canonical ON fhir_curated_resource(resource_type, canonical_url, artifact_version);
+-- curated list filter + export ordering (ORDER BY last_seen_ts DESC, optionally by type)
+CREATE INDEX IF NOT EXISTS ix_curated_last_seen ON fhir_curated_resource(last_seen_ts DESC);
+CREATE INDEX IF NOT EXISTS ix_curated_rt_lastseen ON fhir_curated_resource(resource_type, last_seen_ts DESC);
 
 CREATE TABLE IF NOT EXISTS fhir_curated_variant (
   curated_id INTEGER NOT NULL REFERENCES fhir_curated_resource(curated_id) ON DELETE CASCADE,
@@ -1,11 +1,21 @@
+import io
 import json
+import tarfile
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
 from mdr_gtk.db import connect
 from mdr_gtk.util import read_text
-from mdr_gtk.fhir_ingest import import_fhir_bundle_json, import_fhir_package
+from mdr_gtk.fhir_ingest import (
+    canonical_sha256,
+    import_fhir_bundle_json,
+    import_fhir_bundle_json_text,
+    import_fhir_bundle_xml,
+    import_fhir_package,
+    ref_edges,
+)
 from mdr_gtk.fhir_export import export_curated_bundle_json, export_curated_bundle_xml
 from mdr_gtk.fhir_xml import resource_to_xml_element
 from mdr_gtk.validator import run_external_validator
@@ -49,9 +59,58 @@ class TestFHIRSchemaAndImport(unittest.TestCase):
                 curated = conn.execute("SELECT COUNT(*) FROM fhir_curated_resource").fetchone()[0]
                 self.assertEqual(raw, 2)
                 self.assertEqual(curated, 2)
+
+                # with the source text at hand it is stored as received; the sha is canonical either way
+                text = sample.read_text(encoding="utf-8")
+                res2 = import_fhir_bundle_json(conn, bundle, source_name="test-raw", raw_json=text)
+                self.assertTrue(res2.ok, res2.message)
+                rows = conn.execute("SELECT bundle_sha256, bundle_json FROM fhir_raw_bundle ORDER BY bundle_id").fetchall()
+                self.assertEqual(rows[1][1], text)
+                self.assertEqual(rows[0][0], canonical_sha256(bundle))
+                self.assertEqual(rows[1][0], rows[0][0])
             finally:
                 conn.close()
 
+    def test_import_bundle_json_text_streams_like_parsed_import(self):
+        sample = Path(__file__).with_name("sample_bundle.json")
+        text = sample.read_text(encoding="utf-8")
+        bundle = json.loads(text)
+        # members after the entries, and a repeated "entry" (json.loads keeps the last one)
+        reordered = json.dumps({"entry": bundle["entry"], "type": "batch", "resourceType": "Bundle"}, indent=2)
+        repeated = '{"resourceType": "Bundle", "entry": [], "entry": ' + json.dumps(bundle["entry"]) + "}"
+
+        def snapshot(conn):
+            return (
+                conn.execute("SELECT bundle_type, bundle_sha256, bundle_json FROM fhir_raw_bundle ORDER BY bundle_id").fetchall(),
+                conn.execute("SELECT resource_type, logical_id, resource_sha256, resource_json FROM fhir_raw_resource ORDER BY raw_id").fetchall(),
+                conn.execute("SELECT from_raw_id, from_path, to_reference FROM fhir_reference_edge ORDER BY edge_id").fetchall(),
+            )
+
+        with tempfile.TemporaryDirectory() as td:
+            results = []
+            for name, streamed in (("parsed", False), ("streamed", True)):
+                db_path = str(Path(td) / f"{name}.sqlite")
+                self._init_db(db_path)
+                conn = connect(db_path)
+                try:
+                    for t in (text, reordered, repeated):
+                        if streamed:
+                            res = import_fhir_bundle_json_text(conn, t, source_name=name)
+                        else:
+                            res = import_fhir_bundle_json(conn, json.loads(t), source_name=name, raw_json=t)
+                        self.assertTrue(res.ok, res.message)
+                    results.append([tuple(r) for rows in snapshot(conn) for r in rows])
+
+                    if streamed:
+                        bad = import_fhir_bundle_json_text(conn, text[:-3], source_name="truncated")
+                        self.assertFalse(bad.ok)
+                        other = import_fhir_bundle_json_text(conn, '{"resourceType": "Patient", "id": "x"}')
+                        self.assertEqual(other.message, "Not a FHIR Bundle JSON object")
+                        self.assertEqual(conn.execute("SELECT COUNT(*) FROM fhir_ingest_run").fetchone()[0], 3)
+                finally:
+                    conn.close()
+            self.assertEqual(results[0], results[1])
+
     def test_conflict_flag(self):
         with tempfile.TemporaryDirectory() as td:
             db_path = str(Path(td) / "t.sqlite")
@@ -75,6 +134,128 @@ class TestFHIRSchemaAndImport(unittest.TestCase):
             finally:
                 conn.close()
 
+    def test_ref_edges_paths_in_document_order(self):
+        res = {
+            "resourceType": "Observation",
+            "subject": {"reference": "Patient/1"},
+            "performer": [{"reference": "Practitioner/2"}, {"display": "x"}, {"reference": "Organization/3"}],
+            "hasMember": [{"extension": [{"valueReference": {"reference": "Observation/4"}}]}],
+            "reference": {"reference": "Device/5"},
+        }
+        self.assertEqual(list(ref_edges(res)), [
+            ("subject", "Patient/1"),
+            ("performer[0]", "Practitioner/2"),
+            ("performer[2]", "Organization/3"),
+            ("hasMember[0].extension[0].valueReference", "Observation/4"),
+            ("reference", "Device/5"),
+        ])
+
+    def test_import_links_rows_across_batches(self):
+        with tempfile.TemporaryDirectory() as td:
+            db_path = str(Path(td) / "t.sqlite")
+            self._init_db(db_path)
+
+            bundle = {
+                "resourceType": "Bundle",
+                "type": "collection",
+                "entry": [
+                    {"resource": {"resourceType": "Observation", "id": f"obs-{i}", "status": "final",
+                                  "subject": {"reference": f"Patient/p{i}"}}}
+                    for i in range(7)
+                ],
+            }
+
+            conn = connect(db_path)
+            try:
+                with mock.patch("mdr_gtk.fhir_ingest._FLUSH_EVERY", 3):
+                    r = import_fhir_bundle_json(conn, bundle, source_name="batched")
+                self.assertTrue(r.ok, r.message)
+                self.assertEqual(r.raw_count, 7)
+
+                rows = conn.execute(
+                    "SELECT r.logical_id, c.logical_id, e.to_reference "
+                    "FROM fhir_raw_resource r "
+                    "JOIN fhir_raw_to_curated l ON l.raw_id = r.raw_id "
+                    "JOIN fhir_curated_resource c ON c.curated_id = l.curated_id "
+                    "JOIN fhir_reference_edge e ON e.from_raw_id = r.raw_id "
+                    "ORDER BY r.raw_id"
+                ).fetchall()
+                self.assertEqual(len(rows), 7)
+                for i, (raw_lid, cur_lid, ref) in enumerate(rows):
+                    self.assertEqual(raw_lid, f"obs-{i}")
+                    self.assertEqual(cur_lid, f"obs-{i}")
+                    self.assertEqual(ref, f"Patient/p{i}")
+            finally:
+                conn.close()
+
+    def test_repeated_identity_in_one_import_flags_conflict(self):
+        with tempfile.TemporaryDirectory() as td:
+            db_path = str(Path(td) / "t.sqlite")
+            self._init_db(db_path)
+
+            bundle = {
+                "resourceType": "Bundle",
+                "type": "collection",
+                "entry": [
+                    {"resource": {"resourceType": "ValueSet", "id": "a", "url": "http://x/vs", "status": "draft"}},
+                    {"resource": {"resourceType": "ValueSet", "id": "b", "url": "http://x/vs", "status": "draft"}},
+                    {"resource": {"resourceType": "ValueSet", "id": "a", "url": "http://x/vs", "status": "active"}},
+                    {"resource": {"resourceType": "Patient", "id": "p"}},
+                ],
+            }
+
+            conn = connect(db_path)
+            try:
+                with mock.patch("mdr_gtk.fhir_ingest._FLUSH_EVERY", 2):
+                    r = import_fhir_bundle_json(conn, {**bundle, "entry": bundle["entry"][:2]}, source_name="first")
+                    self.assertTrue(r.ok, r.message)
+                    r = import_fhir_bundle_json(conn, bundle, source_name="second")
+                self.assertTrue(r.ok, r.message)
+
+                curated = conn.execute(
+                    "SELECT resource_type, has_conflict FROM fhir_curated_resource ORDER BY curated_id"
+                ).fetchall()
+                self.assertEqual([tuple(c) for c in curated], [("ValueSet", 1), ("Patient", 0)])
+                occurrences = conn.execute(
+                    "SELECT occurrences FROM fhir_curated_variant WHERE curated_id = 1 ORDER BY rowid"
+                ).fetchall()
+                self.assertEqual([o[0] for o in occurrences], [2, 2, 1])
+                n_links = conn.execute("SELECT COUNT(*) FROM fhir_raw_to_curated").fetchone()[0]
+                self.assertEqual(n_links, 6)
+            finally:
+                conn.close()
+
+    def test_import_bundle_xml(self):
+        xml_text = (
+            '<Bundle xmlns="http://hl7.org/fhir"><type value="batch"/>'
+            '<entry><fullUrl value="urn:p1"/><resource><Patient><id value="p1"/></Patient></resource></entry>'
+            '<entry><resource><Bundle><id value="inner"/><type value="document"/>'
+            '<entry><resource><Patient><id value="p2"/></Patient></resource></entry>'
+            '</Bundle></resource></entry>'
+            '</Bundle>'
+        )
+        with tempfile.TemporaryDirectory() as td:
+            db_path = str(Path(td) / "t.sqlite")
+            self._init_db(db_path)
+            conn = connect(db_path)
+            try:
+                res = import_fhir_bundle_xml(conn, xml_text, source_name="xml")
+                self.assertTrue(res.ok, res.message)
+                btype = conn.execute("SELECT bundle_type FROM fhir_raw_bundle").fetchone()[0]
+                self.assertEqual(btype, "batch")
+                rows = conn.execute(
+                    "SELECT full_url, resource_type, logical_id, resource_json FROM fhir_raw_resource ORDER BY raw_id"
+                ).fetchall()
+                # nested entries are imported too, after their enclosing entry
+                self.assertEqual([tuple(r[:3]) for r in rows],
+                                 [("urn:p1", "Patient", "p1"), (None, "Bundle", "inner"), (None, "Patient", "p2")])
+                self.assertIn("p2", rows[1][3])
+
+                bad = import_fhir_bundle_xml(conn, xml_text[:-5], source_name="truncated")
+                self.assertFalse(bad.ok)
+            finally:
+                conn.close()
+
     def test_export_bundle_json_and_xml(self):
         with tempfile.TemporaryDirectory() as td:
             db_path = str(Path(td) / "t.sqlite")
@@ -98,6 +279,13 @@ class TestFHIRSchemaAndImport(unittest.TestCase):
                 self.assertEqual(obj.get("resourceType"), "Bundle")
                 self.assertEqual(len(obj.get("entry", [])), 2)
 
+                out_pretty = str(Path(td) / "out.pretty.bundle.json")
+                ep = export_curated_bundle_json(conn, out_pretty, limit=100, pretty=True)
+                self.assertTrue(ep.ok, ep.message)
+                pretty_text = Path(out_pretty).read_text(encoding="utf-8")
+                self.assertIn('\n  "resourceType"', pretty_text)
+                self.assertEqual(json.loads(pretty_text), obj)
+
                 ex = export_curated_bundle_xml(conn, out_xml, limit=100)
                 self.assertTrue(ex.ok, ex.message)
                 self.assertTrue(Path(out_xml).exists())
@@ -108,6 +296,8 @@ class TestFHIRSchemaAndImport(unittest.TestCase):
                 tree = ET.parse(out_xml)
                 root = tree.getroot()
                 self.assertTrue(root.tag.endswith("Bundle"))
+                # namespace declared once, on the streamed <Bundle> root
+                self.assertEqual(Path(out_xml).read_bytes().count(b"xmlns="), 1)
             finally:
                 conn.close()
 
@@ -143,6 +333,19 @@ class TestFHIRSchemaAndImport(unittest.TestCase):
             finally:
                 conn.close()
 
+    def test_resource_to_xml_bytes(self):
+        patient = {"resourceType": "Patient", "id": "p1", "active": True, "meta": {},
+                   "name": [{"family": 'O"Neil & <Co>', "given": ["A", "B"]}]}
+        res = resource_to_xml_element(patient, mode="strict")
+        self.assertTrue(res.ok, res.message)
+        self.assertEqual(
+            res.xml_bytes,
+            b'<Patient xmlns="http://hl7.org/fhir"><id value="p1" /><meta /><active value="true" />'
+            b'<name><family value="O&quot;Neil &amp; &lt;Co&gt;" /><given value="A" /><given value="B" /></name>'
+            b'</Patient>',
+        )
+        self.assertEqual(res.element.find("{http://hl7.org/fhir}active").get("value"), "true")
+
     def test_strict_rejects_unknown_fields(self):
         # Patient with an unknown field should be rejected in strict mode
         patient = {"resourceType": "Patient", "id": "p1", "gender": "female", "unknownField": "x"}
@@ -383,6 +586,55 @@ class TestFHIRSchemaAndImport(unittest.TestCase):
             finally:
                 conn.close()
 
+    def test_package_import_with_workers_matches_serial(self):
+        pkg = Path(__file__).with_name("sample_package.tgz")
+        dumps = []
+        for workers in (1, 2):
+            with tempfile.TemporaryDirectory() as td:
+                db_path = str(Path(td) / "t.sqlite")
+                self._init_db(db_path)
+                conn = connect(db_path)
+                try:
+                    res = import_fhir_package(conn, str(pkg), source_name="pkg", extract_references=True, workers=workers)
+                    self.assertTrue(res.ok, res.message)
+                    dumps.append([tuple(r) for r in conn.execute(
+                        "SELECT r.raw_id, r.resource_sha256, r.resource_json, l.curated_id "
+                        "FROM fhir_raw_resource r JOIN fhir_raw_to_curated l ON l.raw_id = r.raw_id ORDER BY r.raw_id"
+                    )])
+                finally:
+                    conn.close()
+        self.assertEqual(len(dumps[0]), 3)
+        self.assertEqual(dumps[0], dumps[1])
+
+    def test_import_package_tgz_prefers_package_dir(self):
+        def patient(pid):
+            return json.dumps({"resourceType": "Patient", "id": pid}).encode("utf-8")
+
+        with tempfile.TemporaryDirectory() as td:
+            layouts = {
+                "npm.tgz": {"other/x.json": patient("outside"), "package/a.json": patient("a"),
+                            "package/package.json": b"{}", "package/sub/b.json": patient("b")},
+                "flat.tgz": {"./a.json": patient("a"), "sub/b.json": patient("b"), "notes.txt": b"x"},
+            }
+            for name, members in layouts.items():
+                with tarfile.open(Path(td) / name, "w:gz") as tf:
+                    for member, data in members.items():
+                        info = tarfile.TarInfo(member)
+                        info.size = len(data)
+                        tf.addfile(info, io.BytesIO(data))
+
+            for name in layouts:
+                db_path = str(Path(td) / f"{name}.sqlite")
+                self._init_db(db_path)
+                conn = connect(db_path)
+                try:
+                    res = import_fhir_package(conn, str(Path(td) / name), source_name=name)
+                    self.assertTrue(res.ok, res.message)
+                    ids = [r[0] for r in conn.execute("SELECT logical_id FROM fhir_raw_resource ORDER BY raw_id")]
+                    self.assertEqual(ids, ["a", "b"], name)
+                finally:
+                    conn.close()
+
     def test_dedup_across_runs(self):
         with tempfile.TemporaryDirectory() as td:
             db_path = str(Path(td) / "t.sqlite")
@@ -402,6 +654,15 @@ class TestFHIRSchemaAndImport(unittest.TestCase):
                 # variants occurrences should be >=2 for at least one curated
                 occ = conn.execute("SELECT MAX(occurrences) FROM fhir_curated_variant").fetchone()[0]
                 self.assertGreaterEqual(occ, 2)
+
+                # single-resource files are stored as received, hashed canonically
+                pat_file = pkg_dir / "Patient-pat-1.json"
+                stored, sha = conn.execute(
+                    "SELECT resource_json, resource_sha256 FROM fhir_raw_resource WHERE run_id=? AND logical_id='pat-1'",
+                    (r1.run_id,),
+                ).fetchone()
+                self.assertEqual(stored, pat_file.read_text(encoding="utf-8"))
+                self.assertEqual(sha, canonical_sha256(json.loads(stored)))
             finally:
                 conn.close()
 
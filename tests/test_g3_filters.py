@@ -1,5 +1,12 @@
+import os
+import sqlite3
+import tempfile
 import unittest
+from contextlib import closing
+
+from mdr_gtk.db import connect, ensure_indexes, has_curated_fts
 from mdr_gtk.fhir_filter import CuratedFilter, build_curated_query
+from mdr_gtk.util import read_text
 
 class TestG3Filters(unittest.TestCase):
     def test_build_query_basic(self):
@@ -16,5 +23,53 @@ class TestG3Filters(unittest.TestCase):
         self.assertIn("has_conflict = 1", sql)
         self.assertEqual(params[-1], 10)
 
+    def test_text_filter_is_case_insensitive_and_null_safe(self):
+        with closing(sqlite3.connect(":memory:")) as conn:
+            conn.executescript("""
+                CREATE TABLE fhir_curated_resource(
+                  resource_type TEXT, logical_id TEXT, canonical_url TEXT, artifact_version TEXT,
+                  has_conflict INTEGER DEFAULT 0, last_seen_ts TEXT
+                );
+                INSERT INTO fhir_curated_resource VALUES
+                  ('Patient', 'Pat-1', NULL, NULL, 0, '1'),
+                  ('StructureDefinition', 'sd-1', 'http://example.org/PatientProfile', '1.0', 0, '2');
+            """)
+            sql, params = build_curated_query(CuratedFilter(text="PATIENT"))
+            self.assertEqual([r[0] for r in conn.execute(sql, params)], ["StructureDefinition"])
+            sql, params = build_curated_query(CuratedFilter(text="pat-"))
+            self.assertEqual([r[0] for r in conn.execute(sql, params)], ["Patient"])
+
+    def test_fts_text_filter_matches_like_semantics(self):
+        with tempfile.TemporaryDirectory() as td:
+            with closing(connect(os.path.join(td, "t.sqlite"))) as conn:
+                conn.executescript(read_text("migrations/schema.sql"))
+                conn.executemany(
+                    "INSERT INTO fhir_curated_resource(resource_type, logical_id, canonical_url, current_sha256, last_seen_ts) "
+                    "VALUES (?,?,?,?,?)",
+                    [("Patient", "Pat-1", None, "a", "1"),
+                     ("StructureDefinition", "sd-1", "http://example.org/PatientProfile", "b", "2")],
+                )
+                conn.commit()
+                ensure_indexes(conn)
+                if not has_curated_fts(conn):
+                    self.skipTest("SQLite build lacks FTS5 trigram tokenizer")
+
+                def idents(text):
+                    sql, params = build_curated_query(CuratedFilter(text=text), use_fts=True)
+                    return [r[1] for r in conn.execute(sql, params)]
+
+                sql, _ = build_curated_query(CuratedFilter(text="PATIENT"), use_fts=True)
+                self.assertIn("MATCH ?", sql)
+                self.assertEqual(idents("PATIENT"), ["http://example.org/PatientProfile"])
+                self.assertEqual(idents("profile"), ["http://example.org/PatientProfile"])
+                self.assertEqual(idents("pat-"), ["Pat-1"])
+                self.assertEqual(idents("sd"), ["http://example.org/PatientProfile"])  # short: LIKE
+
+                conn.execute("UPDATE fhir_curated_resource SET logical_id='obs-9' WHERE logical_id='Pat-1'")
+                self.assertEqual(idents("pat-"), [])
+                self.assertEqual(idents("obs-"), ["obs-9"])
+                conn.execute("DELETE FROM fhir_curated_resource WHERE logical_id='obs-9'")
+                self.assertEqual(idents("obs-"), [])
+
 if __name__ == "__main__":
     unittest.main()
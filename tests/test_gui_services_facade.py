@@ -34,19 +34,18 @@ class TestGUIServiceFacade(TestCase):
                     )
 
                     with mock.patch("mdr_gtk.gui_services.ensure_schema_applied", autospec=True) as ens, \
-                         mock.patch("mdr_gtk.gui_services.import_fhir_bundle_json", autospec=True) as imp:
+                         mock.patch("mdr_gtk.gui_services.import_fhir_bundle_json_text", autospec=True) as imp:
                         svc = GUIServiceFacade(conn)
                         svc.import_fhir_bundle_json_file(str(p))
 
                         ens.assert_called_once_with(conn)
 
-                        # Current behavior: the facade parses the JSON file and forwards the *bundle object*
-                        # (dict) plus source_name.
+                        # Current behavior: the facade reads the JSON file and forwards its *text*
+                        # (parsed entry by entry by the importer) plus source_name.
                         imp.assert_called_once()
                         args, kwargs = imp.call_args
                         self.assertIs(args[0], conn)
-                        self.assertIsInstance(args[1], dict)
-                        self.assertEqual(args[1].get("resourceType"), "Bundle")
+                        self.assertEqual(args[1], '{"resourceType":"Bundle","type":"collection","entry":[]}')
                         self.assertEqual(kwargs.get("source_name"), "file:bundle.json")
 
     def test_import_package_routes_and_ensures_schema(self):
@@ -86,8 +85,40 @@ class TestGUIServiceFacade(TestCase):
                     svc.export_selected_json(["cur1"], "out.json")
                     svc.export_selected_xml(["cur1"], "out.xml")
 
-                    # schema should be ensured once per export call
-                    assert ens.call_count == 2
+                    # schema is checked on the first action only (memoized per facade/connection)
+                    ens.assert_called_once_with(conn)
 
                     exj.assert_called_once_with(conn, ["cur1"], "out.json")
                     exx.assert_called_once_with(conn, ["cur1"], "out.xml")
+
+    def test_reopen_db_rebuilds_facade_for_imports(self):
+        try:
+            import gi  # noqa
+            from mdr_gtk.ui import MDRWindow
+        except Exception:
+            self.skipTest("PyGObject/GTK4 not available")
+        from mdr_gtk.db import connect
+
+        class _Win:
+            pass
+
+        with tempfile.TemporaryDirectory() as td:
+            pkg = Path(td) / "pkg"
+            pkg.mkdir()
+            (pkg / "Patient-p1.json").write_text('{"resourceType":"Patient","id":"p1"}', encoding="utf-8")
+
+            win = _Win()
+            win.conn = connect(str(Path(td) / "a.sqlite"))
+            win.services = GUIServiceFacade(win.conn)
+            win.services.ensure_schema()
+            win._log = win._refresh_list = win._refresh_fhir_views = lambda *a: None
+            win._ensure_schema = lambda: MDRWindow._ensure_schema(win)
+            try:
+                MDRWindow._reopen_db(win, str(Path(td) / "b.sqlite"))
+                self.assertIs(win.services.conn, win.conn)
+                res = win.services.import_fhir_package_file(str(pkg), source_name="dir:pkg")
+                self.assertTrue(res.ok, res.message)
+                (n,) = win.conn.execute("SELECT count(*) FROM fhir_curated_resource").fetchone()
+                self.assertEqual(n, 1)
+            finally:
+                win.conn.close()
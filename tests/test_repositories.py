@@ -0,0 +1,185 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from mdr_gtk.db import connect, ensure_indexes, has_item_fts
+from mdr_gtk.models import RegistrableItem
+from mdr_gtk.repositories import Repo
+from mdr_gtk.scripts.import_json import upsert_rows
+from mdr_gtk.util import read_text
+
+
+class TestRepoBulk(unittest.TestCase):
+    def test_bulk_inserts_match_single_row_methods(self):
+        with tempfile.TemporaryDirectory() as td:
+            conn = connect(str(Path(td) / "t.sqlite"))
+            try:
+                conn.executescript(read_text("migrations/schema.sql"))
+                repo = Repo(conn)
+                repo.create_items([
+                    RegistrableItem("vd-1", "VALUE_DOMAIN", "Sex", "Administrative sex."),
+                    RegistrableItem("cs-1", "CLASSIFICATION_SCHEME", "Scheme", "A scheme."),
+                    RegistrableItem("ci-1", "CLASSIFICATION_ITEM", "One", "Item one."),
+                    RegistrableItem("ci-2", "CLASSIFICATION_ITEM", "Two", "Item two."),
+                ])
+                repo.upsert_value_domain("vd-1", "code", None, None, None, None, None)
+                repo.upsert_classification_scheme("cs-1", None)
+                repo.upsert_classification_item("ci-1", "cs-1", None, "1")
+                repo.upsert_classification_item("ci-2", "cs-1", None, "2")
+
+                repo.upsert_designations([
+                    ("d-1", "vd-1", None, "en", "preferred", "Sex", True),
+                    ("d-2", "vd-1", None, "de", "synonym", "Geschlecht", 0),
+                ])
+                # upsert: second call updates in place
+                repo.upsert_designations([("d-2", "vd-1", None, "de", "synonym", "Geschlecht (adm.)", 0)])
+                repo.upsert_permissible_values([
+                    ("pv-1", "vd-1", "F", "Female", 1),
+                    ("pv-2", "vd-1", "M", "Male", 2),
+                ])
+                repo.add_item_classifications("vd-1", ["ci-1", "ci-2", "ci-1"], "tester")
+                conn.commit()
+
+                self.assertEqual(len(repo.list_items("CLASSIFICATION_ITEM")), 2)
+                des = {r["uuid"]: (r["designation"], r["is_preferred"]) for r in repo.list_designations("vd-1")}
+                self.assertEqual(des, {"d-1": ("Sex", 1), "d-2": ("Geschlecht (adm.)", 0)})
+                self.assertEqual([r["code"] for r in repo.list_permissible_values("vd-1")], ["F", "M"])
+                self.assertEqual(
+                    sorted(r["classification_item_uuid"] for r in repo.list_item_classifications("vd-1")),
+                    ["ci-1", "ci-2"],
+                )
+            finally:
+                conn.close()
+
+    def test_list_items_search_and_order(self):
+        with tempfile.TemporaryDirectory() as td:
+            conn = connect(str(Path(td) / "t.sqlite"))
+            try:
+                conn.executescript(read_text("migrations/schema.sql"))
+                repo = Repo(conn)
+                repo.create_items([
+                    RegistrableItem("p-1", "PROPERTY", "body weight", "Mass of the body."),
+                    RegistrableItem("p-2", "PROPERTY", "Birth Date", "Date of birth."),
+                    RegistrableItem("p-3", "PROPERTY", "Height", "Standing BODY height."),
+                ])
+                conn.commit()
+                ensure_indexes(conn)  # schema applied after connect: backfill index + FTS
+
+                plan = " ".join(r[3] for r in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT uuid FROM registrable_item WHERE item_type=? "
+                    "ORDER BY preferred_name COLLATE NOCASE", ("PROPERTY",)))
+                self.assertIn("ix_ri_type_name_nocase", plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+
+                names = lambda q: [r["preferred_name"] for r in repo.list_items("PROPERTY", q)]
+                self.assertEqual(names(None), ["Birth Date", "body weight", "Height"])
+                self.assertEqual(repo.fetch_refs("PROPERTY"), [("p-2", "Birth Date"), ("p-1", "body weight"), ("p-3", "Height")])
+                self.assertEqual(names("body"), ["body weight", "Height"])
+                self.assertEqual(names("bi"), ["Birth Date"])  # below trigram length: LIKE
+                if has_item_fts(conn):
+                    repo.update_item("p-3", {"definition": "Standing height."})
+                    repo.delete_item("p-1")
+                    conn.commit()
+                    self.assertEqual(names("body"), [])
+            finally:
+                conn.close()
+
+    def test_update_item_bumps_version_and_records_history(self):
+        with tempfile.TemporaryDirectory() as td:
+            conn = connect(str(Path(td) / "t.sqlite"))
+            try:
+                conn.executescript(read_text("migrations/schema.sql"))
+                repo = Repo(conn)
+                repo.create_item(RegistrableItem("p-1", "PROPERTY", "Weight", "Mass."))
+                repo.update_item("p-1", {"definition": "Body mass."}, change_note="first", changed_by="a")
+                repo.update_item("p-1", {"preferred_name": "Body weight", "version": 99}, change_note="second")
+                conn.commit()
+
+                row = repo.get_item("p-1")
+                self.assertEqual((row["preferred_name"], row["definition"], row["version"]), ("Body weight", "Body mass.", 3))
+                hist = [tuple(r) for r in conn.execute(
+                    "SELECT version, changed_by, change_note FROM item_version WHERE item_uuid=? ORDER BY version", ("p-1",))]
+                self.assertEqual(hist, [(1, "a", "first"), (2, None, "second")])
+
+                with self.assertRaises(ValueError):
+                    repo.update_item("missing", {"definition": "x"})
+                self.assertEqual(conn.execute("SELECT count(*) FROM item_version").fetchone()[0], 2)
+            finally:
+                conn.close()
+
+    def test_fetch_refs_cache_invalidated_by_item_writes(self):
+        with tempfile.TemporaryDirectory() as td:
+            conn = connect(str(Path(td) / "t.sqlite"))
+            try:
+                conn.executescript(read_text("migrations/schema.sql"))
+                repo = Repo(conn)
+                repo.create_item(RegistrableItem("p-1", "PROPERTY", "Weight", "Mass."))
+                refs = repo.fetch_refs("PROPERTY")
+                self.assertIs(repo.fetch_refs("PROPERTY"), refs)
+
+                repo.create_item(RegistrableItem("p-2", "PROPERTY", "Height", "Length."))
+                self.assertEqual(repo.fetch_refs("PROPERTY"), [("p-2", "Height"), ("p-1", "Weight")])
+                repo.update_item("p-1", {"preferred_name": "Body weight"})
+                self.assertEqual(repo.fetch_refs("PROPERTY"), [("p-1", "Body weight"), ("p-2", "Height")])
+                repo.delete_item("p-2")
+                self.assertEqual(repo.fetch_refs("PROPERTY"), [("p-1", "Body weight")])
+
+                # writes past the Repo need an explicit invalidation
+                conn.execute("UPDATE registrable_item SET preferred_name='Mass' WHERE uuid='p-1'")
+                self.assertEqual(repo.fetch_refs("PROPERTY"), [("p-1", "Body weight")])
+                repo.invalidate_refs("PROPERTY")
+                self.assertEqual(repo.fetch_refs("PROPERTY"), [("p-1", "Mass")])
+
+                repo.create_item(RegistrableItem("oc-1", "OBJECT_CLASS", "person", "A human."))
+                many = repo.fetch_refs_many(["OBJECT_CLASS", "PROPERTY", "CONCEPTUAL_DOMAIN"])
+                self.assertEqual(many, {
+                    "OBJECT_CLASS": [("oc-1", "person")],
+                    "PROPERTY": [("p-1", "Mass")],
+                    "CONCEPTUAL_DOMAIN": [],
+                })
+                self.assertIs(repo.fetch_refs("OBJECT_CLASS"), many["OBJECT_CLASS"])
+            finally:
+                conn.close()
+
+    def test_item_fts_follows_updates_deletes_and_reimport(self):
+        with tempfile.TemporaryDirectory() as td:
+            conn = connect(str(Path(td) / "t.sqlite"))
+            try:
+                conn.executescript(read_text("migrations/schema.sql"))
+                ensure_indexes(conn)
+                if not has_item_fts(conn):
+                    self.skipTest("SQLite build without FTS5 trigram")
+                repo = Repo(conn)
+                n = 3000
+                repo.create_items(
+                    RegistrableItem(f"p-{i}", "PROPERTY", f"name {i:04d}", f"plain {i % 10}") for i in range(n)
+                )
+                conn.commit()
+                for i in range(0, n, 10):
+                    repo.update_item(f"p-{i}", {"definition": f"changed {i}"})
+                for i in range(5, n, 100):
+                    repo.delete_item(f"p-{i}")
+                conn.commit()
+                # re-import: every surviving row goes through ON CONFLICT DO UPDATE
+                rows = [dict(r) for r in conn.execute("SELECT * FROM registrable_item")]
+                for r in rows[::3]:
+                    r["preferred_name"] = "renamed " + r["uuid"]
+                upsert_rows(conn, "registrable_item", rows)
+                conn.commit()
+
+                def like(q):
+                    return [r["uuid"] for r in conn.execute(
+                        "SELECT uuid FROM registrable_item WHERE item_type='PROPERTY' "
+                        "AND (preferred_name LIKE ? OR definition LIKE ?) ORDER BY preferred_name COLLATE NOCASE",
+                        (f"%{q}%", f"%{q}%"))]
+
+                for q in ("changed 1", "plain 5", "renamed p-1", "name 0105", "name 0010"):
+                    self.assertEqual([r["uuid"] for r in repo.list_items("PROPERTY", q)], like(q), q)
+                (fts_rows,) = conn.execute("SELECT count(*) FROM registrable_item_fts").fetchone()
+                self.assertEqual(fts_rows, len(rows))
+            finally:
+                conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,7 +4,7 @@ import unittest
 from pathlib import Path
 
 from mdr_gtk.services import ensure_schema_applied, MDRServices
-from mdr_gtk.db import connect
+from mdr_gtk.db import connect, has_curated_fts, has_item_fts
 
 
 class TestServicesLayer(unittest.TestCase):
@@ -22,6 +22,35 @@ class TestServicesLayer(unittest.TestCase):
             finally:
                 conn.close()
 
+    def test_ensure_schema_backfills_late_indexes_once(self):
+        with tempfile.TemporaryDirectory() as td:
+            db_path = str(Path(td) / "mdr.sqlite")
+            conn = connect(db_path)
+            try:
+                ensure_schema_applied(conn)
+                conn.execute("DROP INDEX ix_curated_last_seen")
+                conn.commit()
+            finally:
+                conn.close()
+
+            conn = connect(db_path)
+            try:
+                has_index = lambda: conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type='index' AND name='ix_curated_last_seen'").fetchone()
+                self.assertIsNone(has_index())  # connect() runs no migration DDL
+                ensure_schema_applied(conn)
+                self.assertIsNotNone(has_index())
+
+                statements = []
+                conn.set_trace_callback(statements.append)
+                ensure_schema_applied(conn)
+                conn.set_trace_callback(None)
+                if has_curated_fts(conn) and has_item_fts(conn):
+                    # the two sqlite_master probes, no DDL
+                    self.assertEqual(len(statements), 2, statements)
+            finally:
+                conn.close()
+
     def test_services_import_bundle_json_smoke(self):
         # Minimal bundle; importer should accept Bundle with no entries
         bundle = {"resourceType": "Bundle", "type": "collection", "entry": []}
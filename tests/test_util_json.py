@@ -0,0 +1,55 @@
+import json
+import unittest
+
+from mdr_gtk.util import json_dumps_bytes, json_dumps_canonical, json_loads
+
+
+def _stdlib_canonical(obj) -> bytes:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class TestCanonicalJson(unittest.TestCase):
+    def test_matches_stdlib_canonical_form(self):
+        # content hashes of already-ingested resources depend on this exact form
+        samples = [
+            {"resourceType": "Patient", "id": "p1", "name": [{"family": "Müller", "given": ["Zoë"]}]},
+            {"b": 1, "a": {"z": [1, 2, {"y": True, "x": None}]}, "é": 2.5, "\U0001F600": 0},
+            {"v": [0.1, 1.5, 1e-05, 1e-7, 1e16, 1.7976931348623157e308, -0.0, 100.0, 123456789.123]},
+            {"big": 2**64, "neg": -2**63, "s": "\x00\x1f\x7f\"\\/ "},
+            {"nan": float("nan"), "inf": float("inf")},
+            {"urn": "urn:uuid:1e5a0000-0000", "list": "[null"},
+        ]
+        for obj in samples:
+            with self.subTest(obj=obj):
+                self.assertEqual(json_dumps_canonical(obj), _stdlib_canonical(obj))
+
+    def test_round_trip_through_json_loads(self):
+        obj = {"resourceType": "Observation", "valueQuantity": {"value": 0.00012, "unit": "mg"}}
+        self.assertEqual(json_loads(json_dumps_canonical(obj)), obj)
+
+    def test_json_loads_keeps_integers_beyond_64_bit(self):
+        for text in ("[12345678901234567890123]", '{"v": 18446744073709551616}', "[-9223372036854775809, 1.5]"):
+            with self.subTest(text=text):
+                self.assertEqual(json_loads(text), json.loads(text))
+                self.assertEqual(json_loads(text.encode("utf-8")), json.loads(text))
+        self.assertEqual(json_loads("[12345678901234567890123]"), [12345678901234567890123])
+
+    def test_json_dumps_bytes_writes_non_finite_floats_like_stdlib(self):
+        for obj in (
+            {"valueQuantity": {"value": float("nan")}},
+            {"range": [float("inf"), -float("inf")], "missing": None},
+        ):
+            with self.subTest(obj=obj):
+                self.assertEqual(
+                    json_dumps_bytes(obj),
+                    json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+                )
+                self.assertEqual(
+                    json_dumps_bytes(obj, indent=True),
+                    json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8"),
+                )
+        self.assertEqual(json_dumps_bytes({"v": None}), b'{"v":null}')
+
+
+if __name__ == "__main__":
+    unittest.main()